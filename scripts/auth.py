@@ -5,15 +5,23 @@
 import json
 import time
 import uuid
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 from config import AUTH_FILE, API_VERSION
 
 
-def load_auth() -> Tuple[Dict[str, str], Dict[str, str]]:
-    """从 auth.json 加载认证信息，返回 (cookies, headers)"""
-    if not AUTH_FILE.exists():
+def load_auth(
+    auth_file: Optional[Path] = None,
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """从 auth.json 加载认证信息，返回 (cookies, headers)
+
+    Args:
+        auth_file: auth.json 路径（默认使用用户配置中的路径）
+    """
+    auth_file = auth_file or AUTH_FILE
+    if not auth_file.exists():
         raise FileNotFoundError(
-            f"认证文件不存在: {AUTH_FILE}\n"
+            f"认证文件不存在: {auth_file}\n"
             "请按以下步骤创建:\n"
             "1. 打开 https://wx.zsxq.com/dweb/ 并登录\n"
             "2. F12 → Network → 找到 api.zsxq.com 请求\n"
@@ -21,7 +29,7 @@ def load_auth() -> Tuple[Dict[str, str], Dict[str, str]]:
             "4. 创建 auth.json 文件"
         )
 
-    with open(AUTH_FILE, "r", encoding="utf-8") as f:
+    with open(auth_file, "r", encoding="utf-8") as f:
         config = json.load(f)
 
     cookies = config.get("cookies", {})
@@ -64,15 +72,25 @@ def _generate_request_id() -> str:
     return f"{raw[:9]}-{raw[9:13]}-{raw[13:17]}-{raw[17:21]}-{raw[21:32]}"
 
 
-def check_auth_status(cookies: Dict[str, str], headers: Dict[str, str]) -> bool:
-    """检查认证是否有效"""
+def check_auth_status(
+    cookies: Dict[str, str],
+    headers: Dict[str, str],
+    session: Any = None,
+    settings_url: Optional[str] = None,
+) -> bool:
+    """检查认证是否有效
+
+    Args:
+        session: 可选的 requests.Session（复用连接池），默认直接使用 requests
+        settings_url: 校验用的接口地址（默认 ENDPOINTS["settings"]）
+    """
     import requests
     from config import ENDPOINTS
 
     try:
         req_headers = build_request_headers(headers)
-        resp = requests.get(
-            ENDPOINTS["settings"],
+        resp = (session or requests).get(
+            settings_url or ENDPOINTS["settings"],
             headers=req_headers,
             cookies=cookies,
             timeout=15,
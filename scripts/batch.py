@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 批量发布模块
+
+批量发布按流水线进行: 主线程按顺序发送，后续文件的读取、哈希、
+Markdown 转换和校验在工作进程中提前完成，CPU 转换与网络等待重叠。
+提前准备的文件数有上限（prefetch），无论排队多少文件内存占用都保持平稳。
+
+文件通过 front matter 的 profile 指定账号时，按账号分组并行发布，
+每个账号使用各自的发布器（认证、连接池、限流、熔断、发布历史）。
+
+汇总每个文件的结果状态:
+- published: 发布成功
+- skipped: 内容未变更、与历史近似重复（--near-dup）或未到计划时间
+- invalid: 发布前校验未通过
+- failed: 请求失败
+- topic_failed: 文章已创建但引用话题创建失败，重试时只创建话题
+- circuit_open: API 熔断中未发送，稍后重新运行同一命令即可继续
+- lease_lost: 发布队列的租约已过期，未发送（由领取到该文件的发布器继续）
+
+传入检查点（checkpoint.Checkpoint）时每个文件的进度写入清单，
+中断后 resume 从清单继续，已完成的文件不再读取，已转换的文件不再转换。
+
+增量更新（update_batch）另有: updated（文章已更新）、unchanged（未变更）、
+new（未发布过，需用 batch 发布）、topic（以话题发布，不支持编辑）
+"""
+
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from checkpoint import Checkpoint, LeaseLostError
+from frontmatter import MarkdownSource
+from history import latest_by_source
+from planner import plan_update
+from prepare import prepare_file, prepare_job
+from throttle import AdaptiveConcurrency
+
+BATCH_INTERVAL_SECONDS = 3.0
+PIPELINE_MAX_JOBS = 4
+
+
+def result_status(result: Dict[str, Any]) -> str:
+    """把 publish_file 的返回值归类为批量结果状态"""
+    if result.get("skipped"):
+        return "skipped"
+    if result.get("status") in ("circuit_open", "topic_failed", "lease_lost"):
+        return result["status"]
+    if result.get("violations"):
+        return "invalid"
+    if result.get("succeeded"):
+        return "published"
+    return "failed"
+
+
+def _pipeline_executor(jobs: int, file_count: int) -> Executor:
+    """准备阶段的执行器: 多进程并行转换；单进程时用线程，仍可与网络等待重叠"""
+    if jobs > 1 and file_count > 1:
+        return ProcessPoolExecutor(max_workers=jobs)
+    return ThreadPoolExecutor(max_workers=1)
+
+
+def publish_batch(
+    pub: Any,
+    paths: List[Path],
+    mode: str = "auto",
+    tags: Optional[List[str]] = None,
+    interval: float = BATCH_INTERVAL_SECONDS,
+    jobs: Optional[int] = None,
+    prefetch: Optional[int] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    max_concurrency: int = 1,
+    checkpoint: Optional[Checkpoint] = None,
+) -> List[Dict[str, Any]]:
+    """按流水线发布文件（内容未变更的自动跳过），返回每个文件的状态
+
+    max_concurrency 大于 1 时多个文件同时发送，同时在途的请求数由
+    AIMD 控制器按请求耗时和失败信号在 1 到 max_concurrency 之间自动调整，
+    此时不再按 interval 间隔发送。
+
+    Args:
+        pub: ZsxqPublisher 实例
+        paths: 待发布文件（按此顺序发送）
+        mode: 发布模式
+        tags: 附加标签
+        interval: 两次发送之间的间隔（秒）
+        jobs: 准备阶段的工作进程数（默认 CPU 核数，最多 4）
+        prefetch: 最多提前准备的文件数（默认 jobs 的 2 倍）
+        metrics: 传入字典时写入本次运行的耗时统计
+        max_concurrency: 最多同时发送的文件数（默认 1，按顺序发送）
+        checkpoint: 检查点清单，记录每个文件的进度（paths 须在清单中）
+    """
+    jobs = jobs or min(os.cpu_count() or 1, PIPELINE_MAX_JOBS)
+    concurrent = max_concurrency > 1
+    if concurrent and pub.concurrency is None:
+        pub.concurrency = AdaptiveConcurrency(max_concurrency)
+    prefetch = max(1, prefetch or jobs * 2)
+    stats = {
+        "files": len(paths),
+        "jobs": jobs,
+        "prefetch": prefetch,
+        "prepare_seconds": 0.0,
+        "wait_seconds": 0.0,
+        "send_seconds": 0.0,
+    }
+    start = time.perf_counter()
+
+    remaining = iter(paths)
+    # 按输入顺序排队: (路径, 跳过结果, 准备任务)，二者只有一个非空
+    queue: deque = deque()
+    in_flight = 0
+    # 已开始发送的文件，按输入顺序汇总: (路径, (结果, 发送耗时) 或发送任务)
+    sending: deque = deque()
+    results = []
+    # 本次运行已发送的内容哈希 → 文件，内容相同的文件（含不同路径的同一文件）只发送一次
+    sent_hashes: Dict[str, Path] = {}
+
+    def record_checkpoint(path: Path, result: Dict[str, Any]) -> None:
+        """记录文件结果: 失败或熔断未发送的 resume 时重试，其余视为完成
+
+        话题创建失败时文章ID已由 on_article_created 记录，重试时只创建话题。
+        """
+        status = "failed" if result.get("error") else result_status(result)
+        if status == "lease_lost":
+            # 文件已归其他发布器，结果由对方记录
+            return
+        if status in ("failed", "circuit_open", "topic_failed"):
+            checkpoint.update(path, "failed", status=status)
+        else:
+            checkpoint.update(path, "done", status=status)
+            checkpoint.discard_prepared(path)
+
+    def send(path: Path, prepared: Dict[str, Any]) -> tuple:
+        send_start = time.perf_counter()
+        options: Dict[str, Any] = {"dedup": True}
+        try:
+            if checkpoint is not None:
+                # 文章已创建时只创建引用话题，避免重复创建文章
+                options.update(
+                    article_result=checkpoint.item(path).get("article_result"),
+                    on_article_created=lambda article_result: checkpoint.update(
+                        path, "article_created", article_result=article_result
+                    ),
+                )
+            result = pub.publish_prepared(prepared, **options)
+        except LeaseLostError as e:
+            print(f"  [WARN] {e}")
+            result = {"succeeded": False, "status": "lease_lost"}
+        except Exception as e:
+            result = {"error": str(e)}
+        if checkpoint is not None:
+            # 发送完成立即记录，主线程中断时已发送的文件也不会重复发送
+            record_checkpoint(path, result)
+        return result, time.perf_counter() - send_start
+
+    def finish(path: Path, outcome: Any) -> None:
+        result, send_seconds = outcome.result() if isinstance(outcome, Future) else outcome
+        stats["send_seconds"] += send_seconds
+        if result.get("error"):
+            print(f"  [ERROR] 发布 {path.name} 失败: {result['error']}")
+            status = "failed"
+        else:
+            status = result_status(result)
+        results.append({"path": str(path), "status": status})
+
+        # 实际发出请求后才需要间隔，避免请求过快（并发发送时由并发控制器调节）
+        sent = status in ("published", "failed", "topic_failed")
+        if not concurrent and sent and queue:
+            time.sleep(interval * random.uniform(0.8, 1.2))
+
+    sender = ThreadPoolExecutor(max_workers=max_concurrency) if concurrent else None
+    with _pipeline_executor(jobs, len(paths)) as executor, sender or nullcontext():
+
+        def fill() -> None:
+            nonlocal in_flight
+            while in_flight < prefetch:
+                path = next(remaining, None)
+                if path is None:
+                    return
+                if checkpoint is not None and checkpoint.state(path) in (
+                    "converted",
+                    "article_created",
+                ):
+                    # 上次已转换，直接使用保存的数据
+                    prepared = checkpoint.load_prepared(path)
+                    if prepared is not None:
+                        restored: Future = Future()
+                        restored.set_result(prepared)
+                        queue.append((path, None, restored))
+                        in_flight += 1
+                        continue
+                try:
+                    skipped = pub.check_skip(path, dedup=True)
+                except Exception as e:
+                    skipped = {"error": str(e)}
+                if skipped:
+                    queue.append((path, skipped, None))
+                    continue
+                future = executor.submit(prepare_job, (str(path), mode, tags))
+                queue.append((path, None, future))
+                in_flight += 1
+
+        fill()
+        while queue:
+            path, skipped, future = queue.popleft()
+            if future is not None:
+                in_flight -= 1
+            # 先补充准备任务，再等待当前文件，让后续转换与本次发送重叠
+            fill()
+
+            if future is None:
+                outcome = (skipped, 0.0)
+                if checkpoint is not None:
+                    record_checkpoint(path, skipped)
+            else:
+                wait_start = time.perf_counter()
+                prepared = future.result()
+                stats["wait_seconds"] += time.perf_counter() - wait_start
+                stats["prepare_seconds"] += prepared.pop("prepare_seconds", 0.0)
+                if prepared.get("error"):
+                    outcome = ({"error": prepared["error"]}, 0.0)
+                    if checkpoint is not None:
+                        record_checkpoint(path, outcome[0])
+                elif prepared["record_extra"].get("content_hash") in sent_hashes:
+                    content_hash = prepared["record_extra"]["content_hash"]
+                    first = sent_hashes[content_hash]
+                    print(f"  跳过重复内容: {path.name}（与本批次的 {first.name} 相同）")
+                    outcome = ({"skipped": True, "content_hash": content_hash}, 0.0)
+                    if checkpoint is not None:
+                        record_checkpoint(path, outcome[0])
+                else:
+                    if not prepared["violations"]:
+                        sent_hashes[prepared["record_extra"]["content_hash"]] = path
+                    if (
+                        checkpoint is not None
+                        and not prepared["violations"]
+                        and checkpoint.state(path) in ("pending", "failed")
+                    ):
+                        checkpoint.save_prepared(path, prepared)
+                    if sender is not None:
+                        outcome = sender.submit(send, path, prepared)
+                    else:
+                        outcome = send(path, prepared)
+                del prepared
+            sending.append((path, outcome))
+
+            # 并发发送时，在途文件数超过上限再按顺序等待最早的文件
+            while sending and (
+                not concurrent or len(sending) > max_concurrency or not queue
+            ):
+                finish(*sending.popleft())
+
+    stats["wall_seconds"] = time.perf_counter() - start
+    if pub.concurrency is not None:
+        stats["concurrency"] = pub.concurrency.snapshot()
+    if metrics is not None:
+        metrics.update(stats)
+    return results
+
+
+def update_batch(
+    pub: Any,
+    paths: List[Path],
+    interval: float = BATCH_INTERVAL_SECONDS,
+    dry_run: bool = False,
+) -> List[Dict[str, Any]]:
+    """增量更新: 只对发布后内容变更过的文章调用编辑接口
+
+    来源文件与文章ID/话题ID/内容哈希的对应关系取自发布历史，
+    未变更、未发布过和以话题发布的文件不发请求。
+
+    Returns:
+        每个文件的计划（plan_update），status 为 updated/invalid/failed/
+        circuit_open 表示本次更新结果；dry_run 时待更新的文件为 changed
+    """
+    latest = latest_by_source(pub.history)
+    items = [plan_update(path, latest) for path in paths]
+    pending = sum(1 for item in items if item["status"] == "changed")
+    if dry_run:
+        return items
+
+    for item in items:
+        if item["status"] != "changed":
+            continue
+        path = Path(item["path"])
+        try:
+            prepared = prepare_file(str(path), mode="article")
+            result = pub.update_prepared(prepared, latest[str(path.resolve())])
+        except Exception as e:
+            print(f"  [ERROR] 更新 {path.name} 失败: {e}")
+            result = {}
+        status = result_status(result)
+        item["status"] = "updated" if status == "published" else status
+
+        pending -= 1
+        if item["status"] in ("updated", "failed") and pending:
+            time.sleep(interval * random.uniform(0.8, 1.2))
+    return items
+
+
+def split_by_profile(
+    paths: List[Path], default_profile: Optional[str] = None
+) -> Dict[Optional[str], List[Path]]:
+    """按 front matter 中的 profile 把文件分组（只读取文件头部）
+
+    未声明 profile 或头部解析失败的文件归入默认账号，解析错误在发布时报告。
+    """
+    groups: Dict[Optional[str], List[Path]] = {}
+    for path in paths:
+        try:
+            profile = MarkdownSource(path).meta.get("profile", default_profile)
+        except ValueError:
+            profile = default_profile
+        groups.setdefault(profile, []).append(path)
+    return groups
+
+
+def publish_by_profile(
+    make_publisher: Callable[[Optional[str]], Any],
+    paths: List[Path],
+    default_profile: Optional[str] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    **batch_options: Any,
+) -> List[Dict[str, Any]]:
+    """多个账号并行批量发布，返回与 paths 顺序一致的结果
+
+    Args:
+        make_publisher: 按账号名称创建发布器（账号不存在时抛出 ValueError）
+        paths: 待发布文件
+        default_profile: 未在 front matter 中声明账号的文件使用的账号
+        metrics: 传入字典时写入汇总统计，各账号的统计在 metrics["profiles"] 中
+        batch_options: 传给 publish_batch 的参数
+            （mode/tags/interval/jobs/prefetch/max_concurrency/checkpoint）
+    """
+    groups = split_by_profile(paths, default_profile)
+
+    def run(profile: Optional[str], group: List[Path]) -> tuple:
+        profile_metrics: Dict[str, Any] = {}
+        try:
+            pub = make_publisher(profile)
+        except ValueError as e:
+            print(f"  [ERROR] {e}")
+            return [{"path": str(p), "status": "failed"} for p in group], {}
+        if len(groups) > 1 and not pub.log_prefix:
+            pub.log_prefix = f"[{profile or 'default'}] "
+        try:
+            results = publish_batch(pub, group, metrics=profile_metrics, **batch_options)
+        finally:
+            pub.close()
+        return results, profile_metrics
+
+    start = time.perf_counter()
+    if len(groups) == 1:
+        outcomes = {profile: run(profile, group) for profile, group in groups.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            futures = {
+                profile: executor.submit(run, profile, group)
+                for profile, group in groups.items()
+            }
+            outcomes = {profile: f.result() for profile, f in futures.items()}
+
+    by_path: Dict[str, Dict[str, Any]] = {}
+    for profile, (results, _) in outcomes.items():
+        for result in results:
+            result["profile"] = profile or "default"
+            by_path[result["path"]] = result
+
+    if metrics is not None:
+        profile_metrics = {
+            profile or "default": m for profile, (_, m) in outcomes.items() if m
+        }
+        metrics.update(
+            files=len(paths),
+            wall_seconds=time.perf_counter() - start,
+            prepare_seconds=sum(m["prepare_seconds"] for m in profile_metrics.values()),
+            wait_seconds=sum(m["wait_seconds"] for m in profile_metrics.values()),
+            send_seconds=sum(m["send_seconds"] for m in profile_metrics.values()),
+            profiles=profile_metrics,
+        )
+    return [by_path[str(path)] for path in paths]
+
+
+def print_batch_summary(
+    results: List[Dict[str, Any]],
+    metrics: Optional[Dict[str, Any]] = None,
+    heading: str = "批量发布完成",
+) -> None:
+    """打印批量结果汇总，熔断未发送的文件单独列出"""
+    print(f"\n{heading}: 共 {len(results)} 个文件（{_count_statuses(results)}）")
+
+    profiles = sorted({r["profile"] for r in results if "profile" in r})
+    if len(profiles) > 1:
+        for profile in profiles:
+            group = [r for r in results if r.get("profile") == profile]
+            print(f"  [{profile}] {len(group)} 个文件（{_count_statuses(group)}）")
+
+    pending = [r["path"] for r in results if r["status"] == "circuit_open"]
+    if pending:
+        print(f"以下 {len(pending)} 个文件因 API 熔断未发送，稍后重新运行即可继续:")
+        for path in pending:
+            print(f"  - {path}")
+
+    if metrics:
+        print(
+            f"耗时: {metrics['wall_seconds']:.2f} 秒"
+            f"（准备 {metrics['prepare_seconds']:.2f} 秒，"
+            f"等待准备 {metrics['wait_seconds']:.2f} 秒，"
+            f"发送 {metrics['send_seconds']:.2f} 秒）"
+        )
+        per_profile = metrics.get("profiles") or {"": metrics}
+        for profile, m in sorted(per_profile.items()):
+            if m.get("concurrency"):
+                c = m["concurrency"]
+                label = f"[{profile}] " if len(per_profile) > 1 else ""
+                print(
+                    f"{label}并发上限: {c['limit']}（峰值 {c['peak']}，"
+                    f"最大 {c['maximum']}，退避 {c['backoffs']} 次）"
+                )
+
+
+def _count_statuses(results: List[Dict[str, Any]]) -> str:
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return ", ".join(f"{k} {v}" for k, v in sorted(counts.items()))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - HTTP 传输基准测试
+
+在本地模拟服务上用不同的传输配置创建同样的一批文章，比较耗时和上行字节数:
+
+  plain         requests（HTTP/1.1），不压缩
+  gzip          requests，请求体 gzip 压缩
+  gzip-rejected 服务器拒绝压缩（415），验证回退为不压缩的开销
+  httpx         httpx（HTTP/1.1）
+  http2         httpx 开启 HTTP/2
+
+用法:
+  python bench_transport.py --articles 40 --kb 100 --latency 0.05 --bandwidth 2048 --concurrency 4
+
+--bandwidth 模拟上行带宽（KB/s），压缩的收益主要来自传输字节减少，
+不限带宽的本机回环上只能看到压缩本身的 CPU 开销。
+模拟服务为明文 HTTP/1.1，HTTP/2 需通过 HTTPS 的 ALPN 协商，
+http2 在这里与 httpx 相同，多路复用的效果需在真实接口上观察。
+httpx 相关的配置在未安装 httpx（或 h2）时跳过。
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import config
+from payloads import build_article_payload, title_and_summary
+from publisher import ZsxqPublisher
+from stub_server import start_server
+from throttle import AdaptiveConcurrency
+from transport import HttpxSession
+
+VARIANTS = {
+    "plain": {},
+    "gzip": {"compress": True},
+    "gzip-rejected": {"compress": True, "reject_gzip": True},
+    "httpx": {"httpx": True},
+    "http2": {"httpx": True, "http2": True},
+}
+
+_WORDS = (
+    "知识星球 发布 文章 话题 性能 连接 压缩 超时 并发 请求 响应 服务器 客户端 "
+    "数据 缓存 队列 线程 网络 带宽 延迟 吞吐 测试 模拟 配置 接口 历史 内容"
+).split()
+
+
+def sample_markdown(index: int, kb: int, seed: int = 0) -> str:
+    """生成约 kb KB 的 Markdown 文章（段落、列表和代码块，内容随机）"""
+    rng = random.Random(seed * 100003 + index)
+    parts = [f"# 基准测试文章 {index}\n"]
+    size = 0
+    while size < kb * 1024:
+        words = rng.choices(_WORDS, k=rng.randint(20, 60))
+        paragraph = "".join(words) + f"，编号 {rng.randint(0, 10 ** 6)}。\n"
+        if rng.random() < 0.2:
+            paragraph = "\n".join(f"- **{w}** {rng.randint(0, 999)}" for w in words[:5])
+        elif rng.random() < 0.1:
+            paragraph = "```python\n" + "\n".join(
+                f"value_{i} = {rng.randint(0, 99999)}" for i in range(8)
+            ) + "\n```"
+        parts.append(paragraph + "\n")
+        size += len(paragraph.encode("utf-8"))
+    return "\n".join(parts)
+
+
+def run_variant(
+    name: str,
+    articles: List[Dict[str, Any]],
+    latency: float,
+    bandwidth: float,
+    concurrency: int,
+) -> Optional[Dict[str, Any]]:
+    """用一种传输配置创建全部文章，返回耗时和字节统计（缺少依赖时返回 None）"""
+    options = VARIANTS[name]
+    session = None
+    if options.get("httpx"):
+        try:
+            session = HttpxSession(http2=options.get("http2", False))
+        except ImportError as e:
+            print(f"  跳过 {name}: {e}", file=sys.stderr)
+            return None
+
+    server = start_server(
+        latency=latency,
+        bandwidth=bandwidth,
+        reject_gzip=options.get("reject_gzip", False),
+        quiet=True,
+    )
+    # 发布器的接口地址取自 config.API_BASE，指向本次启动的模拟服务
+    config.API_BASE = f"http://127.0.0.1:{server.server_address[1]}/v2"
+    state = server.RequestHandlerClass.state
+
+    with tempfile.TemporaryDirectory(prefix="zsxq-bench-") as tmp:
+        auth_file = Path(tmp) / "auth.json"
+        auth_file.write_text(
+            json.dumps({"cookies": {"zsxq_access_token": "bench"}, "headers": {}}),
+            encoding="utf-8",
+        )
+        pub = ZsxqPublisher(
+            group_id="1",
+            auth_file=auth_file,
+            history_file=Path(tmp) / "publish_history.json",
+            verbose=False,
+            session=session,
+            compress=options.get("compress", False),
+            concurrency=AdaptiveConcurrency(concurrency) if concurrency > 1 else None,
+        )
+
+        def create(article: Dict[str, Any]) -> bool:
+            result = pub.create_article(
+                "",
+                article["title"],
+                body=article["body"],
+                article_payload=article["payload"],
+            )
+            return bool(result.get("succeeded"))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            succeeded = sum(executor.map(create, articles))
+        wall = time.perf_counter() - start
+
+        pub.close()
+        if session is not None:
+            session.close()
+    server.shutdown()
+    server.server_close()
+
+    return {
+        "variant": name,
+        "seconds": wall,
+        "per_second": len(articles) / wall,
+        "sent_kb": state.bytes_received / 1024,
+        "failed": len(articles) - succeeded,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="HTTP 传输配置基准测试（本地模拟服务）")
+    parser.add_argument("--articles", type=int, default=40, help="文章数（默认40）")
+    parser.add_argument("--kb", type=int, default=100, help="每篇 Markdown 大小（KB，默认100）")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟接口耗时（秒）")
+    parser.add_argument(
+        "--bandwidth", type=float, default=2048, help="模拟上行带宽（KB/s，0 为不限）"
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="同时发送的请求数")
+    parser.add_argument(
+        "--variants",
+        default=",".join(VARIANTS),
+        help=f"要比较的配置（逗号分隔，默认全部: {','.join(VARIANTS)}）",
+    )
+    args = parser.parse_args()
+
+    names = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in names if v not in VARIANTS]
+    if unknown:
+        print(f"[error] 未知配置: {', '.join(unknown)}")
+        return 1
+
+    articles = []
+    for i in range(args.articles):
+        md = sample_markdown(i, args.kb)
+        title, body = title_and_summary(md)
+        articles.append(
+            {"title": title, "body": body, "payload": build_article_payload(md, title)}
+        )
+    html_kb = sum(len(json.dumps(a["payload"])) for a in articles) / 1024 / len(articles)
+    print(
+        f"{args.articles} 篇文章，请求体平均 {html_kb:.0f} KB，"
+        f"接口耗时 {args.latency}s，上行带宽 {args.bandwidth or '不限'} KB/s，"
+        f"并发 {args.concurrency}"
+    )
+
+    print(f"\n{'配置':<14}{'耗时(s)':>9}{'篇/秒':>9}{'上行(KB)':>11}{'失败':>6}")
+    for name in names:
+        stats = run_variant(
+            name, articles, args.latency, args.bandwidth * 1024, args.concurrency
+        )
+        if stats:
+            print(
+                f"{stats['variant']:<14}{stats['seconds']:>9.2f}"
+                f"{stats['per_second']:>9.1f}{stats['sent_kb']:>11.0f}{stats['failed']:>6}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
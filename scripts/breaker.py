@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 熔断器模块
+
+API 不稳定时，连续超时 / 连接失败 / 5xx 达到阈值后熔断（open），
+后续请求直接失败而不再等待超时；冷却时间过后进入半开（half_open），
+只放行一个探测请求，成功则恢复（closed），失败则继续熔断。
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器（线程安全）"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        log: Callable[[str], None] = print,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._log = log
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        # 持有探测请求的线程（release_probe 只释放自己持有的探测）
+        self._probe_owner: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN:
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        """是否处于熔断中（半开可探测时返回 False）"""
+        return self.state == OPEN
+
+    def allow_request(self) -> bool:
+        """请求前调用: 关闭时放行；半开时只放行一个探测请求"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._state = HALF_OPEN
+                self._probing = True
+                self._probe_owner = threading.get_ident()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """请求得到正常响应（包括 4xx 业务错误）"""
+        with self._lock:
+            if self._state != CLOSED:
+                self._log("  [circuit] 探测成功，恢复请求")
+            self._state = CLOSED
+            self._failures = 0
+            self._clear_probe()
+
+    def release_probe(self) -> None:
+        """请求结束时调用: 当前线程持有的探测请求因其他异常未记录结果时放弃本次探测，
+        下一个请求重新探测（否则一直停在半开，不再放行任何请求）；
+        其他线程的请求结束时不影响正在进行的探测"""
+        with self._lock:
+            if self._probing and self._probe_owner == threading.get_ident():
+                self._clear_probe()
+
+    def _clear_probe(self) -> None:
+        self._probing = False
+        self._probe_owner = None
+
+    def record_failure(self) -> None:
+        """请求超时、连接失败或服务端 5xx"""
+        with self._lock:
+            self._failures += 1
+            self._clear_probe()
+            threshold_reached = self._failures >= self.failure_threshold
+            if self._state == HALF_OPEN or threshold_reached:
+                if self._state != OPEN:
+                    self._log(
+                        f"  [circuit] 连续 {self._failures} 次请求失败，"
+                        f"熔断 {self.reset_timeout:.0f} 秒"
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
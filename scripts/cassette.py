@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - HTTP 录制/回放模块
+
+录制（RecordingTransport）: 包装真实的 requests.Session，把每次请求和响应
+（状态码、响应体、耗时、超时/连接失败）写入 cassette JSON 文件，
+Cookie 等请求头不写入，响应中的 token 替换为占位符。
+
+回放（ReplayTransport）: 按 方法 + 路径 依次返回录制的响应，并按录制耗时
+（可按比例缩放）等待，用于离线复现完整发布流程（包括两步文章发布、
+topic_failed 等失败场景）并做性能回归测试。
+
+两者都实现 publisher 使用的 post()/get()/close() 接口，可直接作为
+ZsxqPublisher 的 session 传入。
+"""
+
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from storage import atomic_write_json
+from transport import decode_json_body
+
+CASSETTE_VERSION = 1
+SCRUBBED = "<scrubbed>"
+
+_TOKEN_RE = re.compile(r"(zsxq_access_token[\"']?\s*[=:]\s*[\"']?)[^;\s\"',}]+")
+
+
+class CassetteResponse:
+    """回放用的响应对象（提供 publisher 用到的 requests.Response 接口）"""
+
+    def __init__(self, status_code: int, text: str, elapsed: float = 0.0):
+        self.status_code = status_code
+        self.text = text
+        self.elapsed_seconds = elapsed
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+def _path_of(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class RecordingTransport:
+    """录制真实请求到 cassette 文件（close() 时写盘）"""
+
+    def __init__(self, path: str, session: Any = None):
+        import requests
+
+        self.path = Path(path)
+        self._session = session or requests.Session()
+        self._exchanges: List[Dict[str, Any]] = []
+        self._secrets: set = set()
+        self._lock = threading.Lock()
+
+    def post(self, url: str, **kwargs: Any) -> Any:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        import requests
+
+        for value in (kwargs.get("cookies") or {}).values():
+            if value:
+                self._secrets.add(str(value))
+
+        exchange: Dict[str, Any] = {
+            "method": method,
+            "path": _path_of(url),
+            "request": {
+                "json": kwargs["json"]
+                if "json" in kwargs
+                else decode_json_body(kwargs.get("data"), kwargs.get("headers"))
+            },
+        }
+        start = time.perf_counter()
+        try:
+            resp = self._session.request(method, url, **kwargs)
+            exchange["response"] = {"status": resp.status_code, "body": resp.text}
+            return resp
+        except requests.exceptions.Timeout:
+            exchange["error"] = "timeout"
+            raise
+        except requests.exceptions.ConnectionError:
+            exchange["error"] = "connection_error"
+            raise
+        finally:
+            exchange["elapsed"] = round(time.perf_counter() - start, 4)
+            with self._lock:
+                self._exchanges.append(exchange)
+
+    def _scrub(self, text: str) -> str:
+        text = _TOKEN_RE.sub(r"\1" + SCRUBBED, text)
+        for secret in self._secrets:
+            text = text.replace(secret, SCRUBBED)
+        return text
+
+    def save(self) -> None:
+        """写出 cassette（token 已替换）"""
+        with self._lock:
+            raw = json.dumps(self._exchanges, ensure_ascii=False)
+        exchanges = json.loads(self._scrub(raw))
+        atomic_write_json(
+            self.path, {"version": CASSETTE_VERSION, "exchanges": exchanges}
+        )
+
+    def close(self) -> None:
+        self.save()
+        self._session.close()
+
+
+class ReplayTransport:
+    """从 cassette 回放响应，不发起任何网络请求"""
+
+    def __init__(
+        self, path: str, latency_scale: float = 1.0, cycle: bool = False
+    ):
+        """
+        Args:
+            path: cassette 文件路径
+            latency_scale: 耗时缩放比例（0 表示不等待，2 表示两倍耗时）
+            cycle: 同一路径的录制响应用完后是否从头循环
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"不支持的 cassette 版本: {data.get('version')}")
+
+        self.latency_scale = latency_scale
+        self.cycle = cycle
+        self._recorded: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for exchange in data.get("exchanges", []):
+            key = (exchange["method"], exchange["path"])
+            self._recorded[key].append(exchange)
+        self._queues: Dict[tuple, Deque[Dict[str, Any]]] = {
+            key: deque(items) for key, items in self._recorded.items()
+        }
+        self._lock = threading.Lock()
+
+    def post(self, url: str, **kwargs: Any) -> CassetteResponse:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> CassetteResponse:
+        return self.request("GET", url, **kwargs)
+
+    def _next_exchange(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue and self.cycle and self._recorded.get(key):
+                queue = self._queues[key] = deque(self._recorded[key])
+            return queue.popleft() if queue else None
+
+    def request(self, method: str, url: str, **kwargs: Any) -> CassetteResponse:
+        import requests
+
+        key = (method, _path_of(url))
+        exchange = self._next_exchange(key)
+        if exchange is None:
+            raise requests.exceptions.ConnectionError(
+                f"cassette 中没有剩余的录制响应: {method} {key[1]}"
+            )
+
+        elapsed = exchange.get("elapsed", 0.0)
+        if self.latency_scale > 0 and elapsed > 0:
+            time.sleep(elapsed * self.latency_scale)
+
+        error = exchange.get("error")
+        if error == "timeout":
+            raise requests.exceptions.Timeout("回放: 录制时请求超时")
+        if error == "connection_error":
+            raise requests.exceptions.ConnectionError("回放: 录制时连接失败")
+
+        response = exchange["response"]
+        return CassetteResponse(response["status"], response["body"], elapsed)
+
+    def remaining(self) -> int:
+        """尚未回放的录制响应数"""
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def close(self) -> None:
+        pass
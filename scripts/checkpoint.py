@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 批量检查点模块
+
+batch --manifest 在开始时写入清单文件，记录每个待发布文件及其状态:
+
+- pending: 尚未处理
+- converted: 已读取、转换并校验，准备好的数据保存在 <清单>.items/ 中
+- article_created: 文章已创建（记录文章ID），引用话题尚未创建
+- done: 已完成（发布成功、跳过或校验未通过，结果状态在 status 中）
+- failed: 请求失败或熔断未发送，resume 时重试；
+  文章已创建但话题创建失败的（status 为 topic_failed）保留文章ID，只重试话题
+
+每次状态变化都原子写入清单。进程崩溃或中断后，resume <清单> 跳过 done 的文件
+（不再读取），converted 的文件直接使用保存的数据（不再转换），
+article_created 的文件只创建引用话题（不会重复创建文章）。
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from storage import atomic_write_json
+
+MANIFEST_VERSION = 1
+CHECKPOINT_STATES = ("pending", "converted", "article_created", "done", "failed")
+
+
+class LeaseLostError(RuntimeError):
+    """文件已不归本次运行处理（发布队列的租约已过期，可能已被其他发布器领取）"""
+
+
+class Checkpoint:
+    """批量发布检查点清单（线程安全）"""
+
+    def __init__(self, path: Path, data: Dict[str, Any]):
+        self.path = Path(path)
+        self.data = data
+        self._index = {item["path"]: i for i, item in enumerate(data["items"])}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls, path: Path, paths: List[Path], options: Dict[str, Any]
+    ) -> "Checkpoint":
+        """写入新清单，所有文件为 pending
+
+        Args:
+            path: 清单文件路径
+            paths: 待发布文件（按发布顺序）
+            options: 本次运行的参数（resume 时沿用）
+        Raises:
+            FileExistsError: 清单已存在（应使用 resume 继续）
+        """
+        path = Path(path)
+        if path.exists():
+            raise FileExistsError(f"清单已存在: {path}（继续上次运行请使用 resume）")
+        now = datetime.now().isoformat()
+        checkpoint = cls(path, {
+            "version": MANIFEST_VERSION,
+            "created": now,
+            "updated": now,
+            "options": options,
+            "items": [{"path": str(p), "state": "pending"} for p in paths],
+        })
+        checkpoint._save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint":
+        """读取清单
+
+        Raises:
+            FileNotFoundError: 清单不存在
+            ValueError: 清单格式无效
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"清单不存在: {path}")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"清单格式错误: {e}")
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"不支持的清单版本: {path}")
+        return cls(path, data)
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        return self.data.get("options", {})
+
+    @property
+    def items_dir(self) -> Path:
+        """准备好的数据的保存目录"""
+        return self.path.with_name(self.path.name + ".items")
+
+    def item(self, path: Path) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.data["items"][self._index[str(path)]])
+
+    def state(self, path: Path) -> str:
+        return self.item(path)["state"]
+
+    def paths(self, exclude_done: bool = False) -> List[Path]:
+        """清单中的文件（按原顺序）"""
+        with self._lock:
+            return [
+                Path(item["path"])
+                for item in self.data["items"]
+                if not (exclude_done and item["state"] == "done")
+            ]
+
+    def results(self) -> List[Dict[str, Any]]:
+        """已完成文件的结果（与批量发布结果格式相同）"""
+        with self._lock:
+            return [
+                {"path": item["path"], "status": item.get("status", "published")}
+                for item in self.data["items"]
+                if item["state"] == "done"
+            ]
+
+    def update(self, path: Path, state: str, **fields: Any) -> None:
+        """更新文件状态并原子写入清单"""
+        if state not in CHECKPOINT_STATES:
+            raise ValueError(f"未知的检查点状态: {state}")
+        with self._lock:
+            item = self.data["items"][self._index[str(path)]]
+            item.update(fields, state=state)
+            self.data["updated"] = datetime.now().isoformat()
+            self._save()
+
+    def save_prepared(self, path: Path, prepared: Dict[str, Any]) -> None:
+        """保存准备好的数据并标记为 converted"""
+        atomic_write_json(self._prepared_file(path), prepared)
+        self.update(path, "converted")
+
+    def load_prepared(self, path: Path) -> Optional[Dict[str, Any]]:
+        """读取保存的准备数据（缺失或损坏时返回 None，调用方重新准备）"""
+        try:
+            with open(self._prepared_file(path), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def discard_prepared(self, path: Path) -> None:
+        """文件完成后删除保存的准备数据"""
+        try:
+            self._prepared_file(path).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _prepared_file(self, path: Path) -> Path:
+        return self.items_dir / f"{self._index[str(path)]:05d}.json"
+
+    def _save(self) -> None:
+        atomic_write_json(self.path, self.data)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 库调用接口
+
+供其他 Python 程序（如常驻的 Web 服务）嵌入使用:
+
+    from client import ZsxqClient
+
+    with ZsxqClient(group_id="15554418212152", data_dir="/srv/zsxq") as client:
+        result = client.publish_file("post.md", tags=["周报"])
+        if result.succeeded:
+            print(result.topic_id)
+
+与命令行不同，客户端的星球ID、数据目录、接口地址、超时和传输选项都由参数决定，
+不读取 data/user_config.json 中的设置（未传入的使用内置默认值）；
+认证信息和发布历史延迟加载，不向标准输出打印（包括警告），返回 PublishResult 对象。
+一个客户端可在进程内长期复用（HTTP 连接池保持），结束时关闭。
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import DATA_DIR, DEFAULT_API_BASE, REQUEST_TIMEOUTS
+from publisher import ZsxqPublisher
+from transport import resolve_timeouts
+
+
+@dataclass
+class PublishResult:
+    """一次发布的结构化结果"""
+
+    succeeded: bool
+    status: str
+    publish_type: Optional[str] = None
+    title: Optional[str] = None
+    topic_id: Optional[Any] = None
+    article_id: Optional[str] = None
+    article_url: Optional[str] = None
+    violations: List[str] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_response(
+        cls, raw: Dict[str, Any], record: Optional[Dict[str, Any]] = None
+    ) -> "PublishResult":
+        """由 ZsxqPublisher 的返回值和本次写入的历史记录构建结果"""
+        from batch import result_status
+
+        record = record or {}
+        return cls(
+            succeeded=bool(raw.get("succeeded")),
+            status=record.get("status") or result_status(raw),
+            publish_type=record.get("publish_type"),
+            title=record.get("title"),
+            topic_id=record.get("topic_id"),
+            article_id=record.get("article_id"),
+            article_url=record.get("article_url"),
+            violations=list(raw.get("violations", [])),
+            raw=raw,
+        )
+
+
+class ZsxqClient:
+    """知识星球发布客户端（可作为上下文管理器使用）"""
+
+    def __init__(
+        self,
+        group_id: str,
+        auth_file: Optional[str] = None,
+        data_dir: Optional[str] = None,
+        history_file: Optional[str] = None,
+        near_duplicate_threshold: Optional[float] = None,
+        api_base: str = DEFAULT_API_BASE,
+        timeouts: Optional[Dict[str, Any]] = None,
+        compress: bool = False,
+        http2: bool = False,
+    ):
+        """
+        Args:
+            group_id: 星球ID
+            auth_file: auth.json 路径（默认 <data_dir>/auth.json）
+            data_dir: 数据目录（默认为技能的 data/ 目录）
+            history_file: 发布历史路径（默认 <data_dir>/publish_history.json）
+            near_duplicate_threshold: 相似度阈值（0~1），publish_file 跳过
+                与发布历史近似重复的内容；为空时不检测
+            api_base: 接口地址前缀（如指向本地模拟服务）
+            timeouts: 按接口覆盖的超时 {接口名称: [连接, 读取]}
+                （未列出的接口使用 config.REQUEST_TIMEOUTS）
+            compress: 是否 gzip 压缩请求体
+            http2: 是否使用 HTTP/2（需要 httpx[http2]）
+        Raises:
+            ValueError: 星球ID、相似度阈值或超时配置无效
+        """
+        if not str(group_id).isdigit():
+            raise ValueError(f"星球ID必须是纯数字: {group_id}")
+        if near_duplicate_threshold is not None and not 0 < near_duplicate_threshold <= 1:
+            raise ValueError(f"相似度阈值必须在 0~1 之间: {near_duplicate_threshold}")
+
+        data_path = Path(data_dir) if data_dir else DATA_DIR
+        self._publisher = ZsxqPublisher(
+            group_id=str(group_id),
+            auth_file=Path(auth_file or data_path / "auth.json"),
+            history_file=Path(history_file or data_path / "publish_history.json"),
+            verbose=False,
+            near_duplicate_threshold=near_duplicate_threshold,
+            # 传入完整的超时表和传输选项，不使用用户配置中的设置
+            timeouts=resolve_timeouts(REQUEST_TIMEOUTS, timeouts),
+            compress=compress,
+            http2=http2,
+            api_base=api_base,
+        )
+
+    def __enter__(self) -> "ZsxqClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """释放 HTTP 连接池"""
+        self._publisher.close()
+
+    def _run(self, method: Any, *args: Any, **kwargs: Any) -> PublishResult:
+        self._publisher.last_record = None
+        raw = method(*args, **kwargs)
+        return PublishResult.from_response(raw, self._publisher.last_record)
+
+    def publish_topic(
+        self, text: str, title: str = "", tags: Optional[List[str]] = None
+    ) -> PublishResult:
+        """发布话题"""
+        return self._run(
+            self._publisher.publish_topic, text, title=title, tags=tags
+        )
+
+    def publish_article(
+        self, md_content: str, title: str = "", tags: Optional[List[str]] = None
+    ) -> PublishResult:
+        """发布文章（两步流程）"""
+        return self._run(
+            self._publisher.publish_article, md_content, title=title, tags=tags
+        )
+
+    def publish_file(
+        self,
+        file_path: str,
+        mode: str = "auto",
+        tags: Optional[List[str]] = None,
+        dedup: bool = False,
+    ) -> PublishResult:
+        """发布 Markdown 文件（支持 front matter）"""
+        return self._run(
+            self._publisher.publish_file,
+            file_path,
+            mode=mode,
+            tags=tags,
+            dedup=dedup,
+        )
+
+    def check_auth(self) -> bool:
+        """检查认证是否有效"""
+        from auth import check_auth_status
+
+        try:
+            cookies = self._publisher.cookies
+            headers = self._publisher.base_headers
+        except (FileNotFoundError, ValueError):
+            return False
+        return check_auth_status(
+            cookies,
+            headers,
+            session=self._publisher.session,
+            settings_url=self._publisher.endpoints["settings"],
+        )
+
+    def reload_auth(self) -> None:
+        """重新读取 auth.json（重新登录后调用）"""
+        self._publisher.reload_auth()
+
+    def history(self, count: int = 10) -> List[Dict[str, Any]]:
+        """最近的发布历史"""
+        return self._publisher.get_history(count=count)
@@ -3,11 +3,24 @@
 """知识星球发布工具 - 配置模块
 
 用户配置存储在 data/user_config.json 中，首次运行时自动引导设置。
+
+多个账号时在 profiles 中声明命名账号配置，命令行用 --profile 选择:
+
+    {
+      "group_id": "...", "auth_file": "...",        # 默认账号
+      "profiles": {
+        "alice": {"group_id": "...", "rate_limit": 20, "burst": 2}
+      }
+    }
+
+命名账号的 auth.json、发布历史和浏览器会话默认存放在 data/profiles/<名称>/ 下。
 """
 
 import json
+import re
 import sys
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # 目录配置（固定，不随用户变化）
 SKILL_DIR = Path(__file__).parent.parent
@@ -15,16 +28,41 @@ SCRIPTS_DIR = SKILL_DIR / "scripts"
 DATA_DIR = SKILL_DIR / "data"
 PUBLISH_HISTORY_FILE = DATA_DIR / "publish_history.json"
 USER_CONFIG_FILE = DATA_DIR / "user_config.json"
+BROWSER_PROFILE_DIR = DATA_DIR / "browser_profile"
+PROFILES_DIR = DATA_DIR / "profiles"
+DEFAULT_PROFILE = "default"
+PROFILE_NAME_RE = re.compile(r"^[\w-]+$")
 
-# 确保数据目录存在
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-# 知识星球 API 固定配置
-API_BASE = "https://api.zsxq.com/v2"
+# 知识星球 API 固定配置（user_config.json 中的 api_base 可指向本地模拟服务）
+DEFAULT_API_BASE = "https://api.zsxq.com/v2"
 API_VERSION = "2.89.0"
 ARTICLE_THRESHOLD = 500
 TOPIC_MAX_TEXT_LENGTH = 10000
 TOPIC_MAX_IMAGE_COUNT = 9
+ARTICLE_MAX_HTML_LENGTH = 500000
+# 大文件阈值: 正文字节数超过时内存映射读取，字符数超过时分块转换 HTML；
+# 取文章 HTML 上限的一半，转换后仍在上限内的文件才能走到大文件路径
+LARGE_FILE_THRESHOLD = ARTICLE_MAX_HTML_LENGTH // 2
+
+# 近似重复检测的默认相似度阈值（SimHash，0~1）
+NEAR_DUPLICATE_THRESHOLD = 0.9
+
+# 视为限流的接口错误码（HTTP 200 但 succeeded 为 false），可按实际响应补充
+API_THROTTLE_CODES = (1059,)
+
+# HTTP 超时（秒）: 接口名称 -> (连接超时, 读取超时)，未列出的接口使用 default；
+# user_config.json 的 "timeouts" 可按接口覆盖，如 {"create_article": [5, 120]}
+REQUEST_TIMEOUTS = {
+    "default": (5.0, 30.0),
+    "create_article": (5.0, 60.0),
+    "update_article": (5.0, 60.0),
+    "create_topic": (5.0, 30.0),
+    "settings": (5.0, 15.0),
+}
+
+# 熔断器: 连续失败次数阈值、熔断后多久进入半开探测（秒）
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60
 
 
 def _load_user_config() -> dict:
@@ -35,16 +73,36 @@ def _load_user_config() -> dict:
     return {}
 
 
-def _save_user_config(config: dict) -> None:
-    """保存用户配置"""
-    with open(USER_CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+def _update_user_config(config: dict, profile: Optional[str] = None) -> None:
+    """把配置合并写入默认账号或命名账号（加锁 + 原子写入）
+
+    在文件锁内重新读取磁盘上的最新配置再修改，
+    同时配置多个账号时不会互相覆盖。
+    """
+    from storage import atomic_write_json, file_lock
 
+    with file_lock(USER_CONFIG_FILE):
+        user_config = _load_user_config()
+        if profile is None:
+            user_config.update(config)
+        else:
+            user_config.setdefault("profiles", {}).setdefault(profile, {}).update(config)
+        atomic_write_json(USER_CONFIG_FILE, user_config)
+
+
+def setup_wizard(profile: Optional[str] = None) -> dict:
+    """交互式配置向导，首次运行时调用
+
+    Args:
+        profile: 命名账号（为空时配置默认账号）
+    """
+    if profile == DEFAULT_PROFILE:
+        profile = None
+    if profile is not None:
+        _check_profile_name(profile)
 
-def setup_wizard() -> dict:
-    """交互式配置向导，首次运行时调用"""
     print("=" * 50)
-    print("  知识星球发布工具 - 首次配置")
+    print("  知识星球发布工具 - " + (f"账号配置: {profile}" if profile else "首次配置"))
     print("=" * 50)
     print()
 
@@ -60,10 +118,13 @@ def setup_wizard() -> dict:
     # 2. auth.json 路径
     print()
     print("请输入 auth.json 文件的存放路径:")
-    print("  (Cookie 认证文件，留空则存在技能 data/ 目录下)")
+    if profile is None:
+        print("  (Cookie 认证文件，留空则存在技能 data/ 目录下)")
+    else:
+        print(f"  (Cookie 认证文件，留空则存在 data/profiles/{profile}/ 目录下)")
     auth_path = input("  路径: ").strip()
     if not auth_path:
-        auth_path = str(DATA_DIR / "auth.json")
+        auth_path = str(_profile_dir(profile) / "auth.json")
     else:
         auth_path = str(Path(auth_path).resolve())
 
@@ -72,7 +133,7 @@ def setup_wizard() -> dict:
         "auth_file": auth_path,
     }
 
-    _save_user_config(config)
+    _update_user_config(config, profile)
     print()
     print(f"[OK] 配置已保存到 {USER_CONFIG_FILE}")
     print(f"  星球ID: {group_id}")
@@ -81,6 +142,66 @@ def setup_wizard() -> dict:
     return config
 
 
+def _check_profile_name(name: str) -> None:
+    if not PROFILE_NAME_RE.match(name):
+        raise ValueError(f"账号名称只能包含字母、数字、下划线和连字符: {name}")
+
+
+def _profile_dir(profile: Optional[str]) -> Path:
+    """账号数据目录（默认账号为 data/ 本身）"""
+    return PROFILES_DIR / profile if profile else DATA_DIR
+
+
+def list_profiles() -> List[str]:
+    """已配置的账号名称（默认账号在前）"""
+    return [DEFAULT_PROFILE] + sorted(_load_user_config().get("profiles", {}))
+
+
+def get_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """解析账号配置
+
+    Returns:
+        包含 name/group_id/api_base（None 表示使用默认地址）/auth_file/
+        history_file/browser_profile_dir/
+        rate_limit（每分钟请求数，None 表示不限）/burst 的字典
+    Raises:
+        ValueError: 账号不存在或名称无效
+    """
+    config = _load_user_config()
+    if not name or name == DEFAULT_PROFILE:
+        return {
+            "name": DEFAULT_PROFILE,
+            "group_id": str(config.get("group_id", "")),
+            "api_base": config.get("api_base"),
+            "auth_file": Path(config.get("auth_file", str(DATA_DIR / "auth.json"))),
+            "history_file": PUBLISH_HISTORY_FILE,
+            "browser_profile_dir": BROWSER_PROFILE_DIR,
+            "rate_limit": config.get("rate_limit"),
+            "burst": int(config.get("burst", 1)),
+        }
+
+    _check_profile_name(name)
+    profiles = config.get("profiles", {})
+    if name not in profiles:
+        available = ", ".join(list_profiles())
+        raise ValueError(f"未找到账号配置: {name}（可用: {available}）")
+
+    raw = profiles[name]
+    base = _profile_dir(name)
+    return {
+        "name": name,
+        "group_id": str(raw.get("group_id", "")),
+        "api_base": raw.get("api_base") or config.get("api_base"),
+        "auth_file": Path(raw.get("auth_file", str(base / "auth.json"))),
+        "history_file": Path(
+            raw.get("history_file", str(base / "publish_history.json"))
+        ),
+        "browser_profile_dir": base / "browser_profile",
+        "rate_limit": raw.get("rate_limit"),
+        "burst": int(raw.get("burst", 1)),
+    }
+
+
 def get_user_config() -> dict:
     """获取用户配置，不存在则运行配置向导"""
     config = _load_user_config()
@@ -94,10 +215,38 @@ _user_config = _load_user_config()
 
 GROUP_ID = _user_config.get("group_id", "")
 AUTH_FILE = Path(_user_config.get("auth_file", str(DATA_DIR / "auth.json")))
+API_BASE = _user_config.get("api_base", DEFAULT_API_BASE).rstrip("/")
+# HTTP 传输调优（见 transport.py）: 请求体 gzip 压缩、HTTP/2（需要 httpx[http2]）
+COMPRESS_REQUESTS = bool(_user_config.get("compress_requests", False))
+HTTP2 = bool(_user_config.get("http2", False))
+TIMEOUT_OVERRIDES = _user_config.get("timeouts") or {}
+
+
+def _api_base(api_base: Optional[str]) -> str:
+    """接口地址前缀（未指定时使用用户配置的 api_base）"""
+    return (api_base or API_BASE).rstrip("/")
+
+
+def build_endpoints(group_id: str, api_base: Optional[str] = None) -> dict:
+    """构建指定星球的 API 地址表（api_base 默认使用用户配置）"""
+    api_base = _api_base(api_base)
+    return {
+        "create_article": f"{api_base}/articles",
+        "create_topic": f"{api_base}/groups/{group_id}/topics",
+        "settings": f"{api_base}/settings",
+        "hashtags": f"{api_base}/users/self/groups/{group_id}/hashtags",
+    }
+
+
+ENDPOINTS = build_endpoints(GROUP_ID)
+
+
+def topic_endpoint(group_id: str, api_base: Optional[str] = None) -> str:
+    """指定星球的话题发布接口（front matter 可声明 groups 发布到其他星球）"""
+    return f"{_api_base(api_base)}/groups/{group_id}/topics"
+
+
+def article_endpoint(article_id: str, api_base: Optional[str] = None) -> str:
+    """已发布文章的编辑接口（PUT，请求体与创建文章相同）"""
+    return f"{_api_base(api_base)}/articles/{article_id}"
 
-ENDPOINTS = {
-    "create_article": f"{API_BASE}/articles",
-    "create_topic": f"{API_BASE}/groups/{GROUP_ID}/topics",
-    "settings": f"{API_BASE}/settings",
-    "hashtags": f"{API_BASE}/users/self/groups/{GROUP_ID}/hashtags",
-}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 近似重复检测模块
+
+每篇发布内容计算 64 位 SimHash 指纹写入发布历史。内容只改了几个字
+（如修正错别字）时指纹只相差几位，按汉明距离换算相似度:
+
+    相似度 = 1 - 不同的位数 / 64
+
+查找时把指纹切成若干段建立分段索引: 允许最多 k 位不同时切成 k+1 段，
+两个指纹相差不超过 k 位则至少有一段完全相同，只需比对同段桶内的候选，
+几万条历史也不用逐条比较。
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SIMHASH_BITS = 64
+# 特征为去掉空白和标点后的连续字符片段
+SHINGLE_CHARS = 3
+# 只取正文开头计算指纹，超大文件不逐字扫描
+FINGERPRINT_SCAN_CHARS = 1024 * 1024
+
+_NOISE_RE = re.compile(r"[\W_]+")
+
+
+def simhash(text: str) -> Optional[int]:
+    """计算文本的 64 位 SimHash，文本没有有效字符时返回 None"""
+    normalized = _NOISE_RE.sub("", text[:FINGERPRINT_SCAN_CHARS].lower())
+    if not normalized:
+        return None
+    if len(normalized) <= SHINGLE_CHARS:
+        shingles = Counter([normalized])
+    else:
+        shingles = Counter(
+            normalized[i:i + SHINGLE_CHARS]
+            for i in range(len(normalized) - SHINGLE_CHARS + 1)
+        )
+
+    # 按字节累计权重，避免对每个特征逐位循环
+    byte_weights = [[0] * 256 for _ in range(SIMHASH_BITS // 8)]
+    for shingle, weight in shingles.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for position, value in enumerate(digest):
+            byte_weights[position][value] += weight
+
+    total = sum(shingles.values())
+    fingerprint = 0
+    for position, weights in enumerate(byte_weights):
+        for bit in range(8):
+            mask = 1 << bit
+            bit_weight = sum(w for value, w in enumerate(weights) if value & mask)
+            if bit_weight * 2 > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def format_fingerprint(fingerprint: Optional[int]) -> Optional[str]:
+    """指纹写入历史时使用 16 位十六进制字符串（JSON 整数可能丢失精度）"""
+    return None if fingerprint is None else f"{fingerprint:016x}"
+
+
+def similarity(a: int, b: int) -> float:
+    """两个指纹的相似度（0~1）"""
+    return 1 - bin(a ^ b).count("1") / SIMHASH_BITS
+
+
+class SimHashIndex:
+    """SimHash 分段索引，查找相似度不低于阈值的历史记录"""
+
+    def __init__(self, threshold: float):
+        """
+        Args:
+            threshold: 相似度阈值（0~1），越低允许的差异越大，索引分段越多
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"相似度阈值必须在 0~1 之间: {threshold}")
+        self.threshold = threshold
+        self.max_distance = int((1 - threshold) * SIMHASH_BITS + 1e-9)
+        bands = self.max_distance + 1
+        self._bands = [
+            (i * SIMHASH_BITS // bands, (i + 1) * SIMHASH_BITS // bands)
+            for i in range(bands)
+        ]
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        self._fingerprints: List[int] = []
+        self._records: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _keys(self, fingerprint: int) -> Iterable[Tuple[int, int]]:
+        for band, (start, end) in enumerate(self._bands):
+            yield band, (fingerprint >> start) & ((1 << (end - start)) - 1)
+
+    def add(self, fingerprint: int, record: Dict[str, Any]) -> None:
+        entry = len(self._records)
+        self._fingerprints.append(fingerprint)
+        self._records.append(record)
+        for key in self._keys(fingerprint):
+            self._buckets.setdefault(key, []).append(entry)
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """加入一条发布历史（没有指纹或话题发布失败的记录忽略）"""
+        value = record.get("simhash")
+        if value and record.get("status") != "topic_failed":
+            self.add(int(value, 16), record)
+
+    def query(self, fingerprint: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """返回相似度不低于阈值的 (相似度, 记录)，相似度高、发布时间近的在前"""
+        fingerprints = self._fingerprints
+        max_distance = self.max_distance
+        matched = set()
+        for key in self._keys(fingerprint):
+            bucket = self._buckets.get(key)
+            if bucket:
+                matched.update(
+                    entry for entry in bucket
+                    if bin(fingerprint ^ fingerprints[entry]).count("1") <= max_distance
+                )
+
+        ranked = sorted(
+            ((similarity(fingerprint, fingerprints[e]), e) for e in matched),
+            reverse=True,
+        )
+        return [(score, self._records[entry]) for score, entry in ranked]
+
+    @classmethod
+    def from_history(
+        cls, history: List[Dict[str, Any]], threshold: float
+    ) -> "SimHashIndex":
+        index = cls(threshold)
+        for record in history:
+            index.add_record(record)
+        return index
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - Front Matter 解析模块
+
+支持在 Markdown 文件头部声明发布元数据:
+
+    ---                          +++
+    title: 标题                  title = "标题"
+    tags: [标签1, 标签2]         tags = ["标签1", "标签2"]
+    mode: article                mode = "article"
+    groups: [15554418212152]     groups = ["15554418212152"]
+    schedule: 2026-01-01 08:00   schedule = "2026-01-01T08:00:00"
+    profile: alice               profile = "alice"
+    ---                          +++
+
+只读取文件头部区域即可得到标题和元数据，正文按需延迟读取，
+批量规划（列表、校验、去重）时无需加载整篇内容。
+"""
+
+import mmap
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import LARGE_FILE_THRESHOLD, PROFILE_NAME_RE
+from markdown_converter import title_from_line
+
+YAML_DELIMITER = "---"
+TOML_DELIMITER = "+++"
+HEADER_MAX_LINES = 200
+TITLE_SCAN_MAX_BYTES = 64 * 1024
+VALID_MODES = ("auto", "topic", "article")
+
+
+class MarkdownSource:
+    """Markdown 源文件
+
+    构造时不读取文件；访问 meta / title 时只读取头部区域，
+    read_body() 才会加载正文（不含 front matter）。
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._meta: Optional[Dict[str, Any]] = None
+        self._body_offset = 0
+        self._title: Optional[str] = None
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """front matter 元数据（已规范化），无 front matter 时为空字典"""
+        if self._meta is None:
+            self._meta, self._body_offset = _read_header(self.path)
+        return self._meta
+
+    @property
+    def body_offset(self) -> int:
+        """正文在文件中的起始字节偏移"""
+        self.meta
+        return self._body_offset
+
+    @property
+    def body_size(self) -> int:
+        """正文字节数（不读取正文）"""
+        return self.path.stat().st_size - self.body_offset
+
+    @property
+    def title(self) -> str:
+        """标题：优先 front matter，其次正文首个非空行"""
+        if self._title is None:
+            self._title = self.meta.get("title") or self._scan_title()
+        return self._title
+
+    def _scan_title(self) -> str:
+        with open(self.path, "rb") as f:
+            f.seek(self.body_offset)
+            scanned = 0
+            for raw in f:
+                scanned += len(raw)
+                stripped = raw.decode("utf-8", errors="replace").strip()
+                if stripped:
+                    return title_from_line(stripped)
+                if scanned >= TITLE_SCAN_MAX_BYTES:
+                    break
+        return ""
+
+    def read_body(self) -> str:
+        """读取正文（不含 front matter）
+
+        大文件通过内存映射直接解码为字符串，不额外保留一份字节副本。
+        """
+        with open(self.path, "rb") as f:
+            if self.body_size <= LARGE_FILE_THRESHOLD:
+                f.seek(self.body_offset)
+                text = f.read().decode("utf-8")
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    view = memoryview(mm)[self.body_offset:]
+                    try:
+                        text = str(view, "utf-8")
+                    finally:
+                        view.release()
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        return text
+
+    def resolve_mode(self, mode: str, threshold: int) -> Optional[str]:
+        """仅根据文件大小判断 auto 模式，无法确定时返回 None
+
+        UTF-8 每个字符 1~4 字节: 字节数不超过阈值必为话题，
+        超过阈值 4 倍必为文章，介于两者之间需读取正文计数。
+        """
+        if mode == "auto":
+            mode = self.meta.get("mode", "auto")
+        if mode != "auto":
+            return mode
+        size = self.body_size
+        if size <= threshold:
+            return "topic"
+        if size > threshold * 4:
+            return "article"
+        return None
+
+
+def is_scheduled_later(meta: Dict[str, Any]) -> bool:
+    """front matter 中的 schedule 是否尚未到达"""
+    schedule = meta.get("schedule")
+    if schedule is None:
+        return False
+    now = datetime.now(schedule.tzinfo) if schedule.tzinfo else datetime.now()
+    return schedule > now
+
+
+def _read_header(path: Path) -> Tuple[Dict[str, Any], int]:
+    """读取并解析 front matter，返回 (元数据, 正文起始偏移)"""
+    with open(path, "rb") as f:
+        first = f.readline()
+        opening = first.decode("utf-8-sig", errors="replace").strip()
+        if opening not in (YAML_DELIMITER, TOML_DELIMITER):
+            return {}, _bom_length(first)
+
+        lines = []
+        for _ in range(HEADER_MAX_LINES):
+            raw = f.readline()
+            if not raw:
+                break
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line.strip() == opening:
+                raw_meta = _parse_header("\n".join(lines), opening)
+                return _normalize_meta(raw_meta, path), f.tell()
+            lines.append(line)
+
+    # 未找到结束分隔符，视为普通正文
+    return {}, _bom_length(first)
+
+
+def _bom_length(first_line: bytes) -> int:
+    return 3 if first_line.startswith(b"\xef\xbb\xbf") else 0
+
+
+def _parse_header(text: str, delimiter: str) -> Dict[str, Any]:
+    """解析头部文本（优先使用 PyYAML / tomllib，不可用时回退简单解析）"""
+    if delimiter == TOML_DELIMITER:
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                return _simple_parse(text, "=")
+        try:
+            return tomllib.loads(text)
+        except Exception as e:
+            raise ValueError(f"TOML front matter 解析失败: {e}")
+
+    try:
+        import yaml
+    except ImportError:
+        return _simple_parse(text, ":")
+    try:
+        data = yaml.safe_load(text)
+    except Exception as e:
+        raise ValueError(f"YAML front matter 解析失败: {e}")
+    return data if isinstance(data, dict) else {}
+
+
+def _simple_parse(text: str, separator: str) -> Dict[str, Any]:
+    """简单的 key: value / key = value 解析（支持行内列表和 YAML 块列表）"""
+    result: Dict[str, Any] = {}
+    current_list: Optional[List[Any]] = None
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if current_list is not None and stripped.startswith("- "):
+            current_list.append(_parse_scalar(stripped[2:]))
+            continue
+        current_list = None
+        if separator not in stripped:
+            continue
+        key, value = stripped.split(separator, 1)
+        key, value = key.strip(), value.strip()
+        if not value:
+            current_list = []
+            result[key] = current_list
+        elif value.startswith("[") and value.endswith("]"):
+            items = [v for v in value[1:-1].split(",") if v.strip()]
+            result[key] = [_parse_scalar(v) for v in items]
+        else:
+            result[key] = _parse_scalar(value)
+
+    return result
+
+
+def _parse_scalar(value: str) -> Any:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+        return value[1:-1]
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
+def _parse_schedule(value: Any) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析 schedule 时间: {text}")
+
+
+def _normalize_meta(raw: Dict[str, Any], path: Path) -> Dict[str, Any]:
+    """规范化元数据字段: title/tags/mode/groups/schedule/profile"""
+    meta: Dict[str, Any] = {}
+
+    title = raw.get("title")
+    if title:
+        meta["title"] = str(title).strip()
+
+    tags = _as_list(raw.get("tags"))
+    if tags:
+        meta["tags"] = tags
+
+    mode = raw.get("mode")
+    if mode:
+        mode = str(mode).strip().lower()
+        if mode not in VALID_MODES:
+            raise ValueError(f"{path.name}: 无效的 mode: {mode}")
+        meta["mode"] = mode
+
+    groups = _as_list(raw.get("groups") or raw.get("group"))
+    for group_id in groups:
+        if not group_id.isdigit():
+            raise ValueError(f"{path.name}: 星球ID必须是纯数字: {group_id}")
+    if groups:
+        meta["groups"] = groups
+
+    try:
+        schedule = _parse_schedule(raw.get("schedule"))
+    except ValueError as e:
+        raise ValueError(f"{path.name}: {e}")
+    if schedule:
+        meta["schedule"] = schedule
+
+    profile = raw.get("profile")
+    if profile:
+        profile = str(profile).strip()
+        if not PROFILE_NAME_RE.match(profile):
+            raise ValueError(f"{path.name}: 无效的账号名称: {profile}")
+        meta["profile"] = profile
+
+    return meta
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 发布历史模块
+
+发布历史存储在 data/publish_history.json 中，每条记录包含话题ID、
+文章链接、来源文件及其内容哈希，用于查看历史和跳过未变更文件。
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import PUBLISH_HISTORY_FILE
+from storage import atomic_write_json, file_lock, quarantine_corrupt
+
+
+def load_history(
+    history_file: Optional[Path] = None, log: Callable[[str], None] = print
+) -> list:
+    """加载发布历史
+
+    文件损坏时改名保留（不会被后续写入覆盖），通过 log 提示并返回空列表。
+    """
+    history_file = history_file or PUBLISH_HISTORY_FILE
+    if not history_file.exists():
+        return []
+    try:
+        with open(history_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        backup = quarantine_corrupt(history_file)
+        log(f"  [WARN] 发布历史文件已损坏，已备份到 {backup}")
+        return []
+
+
+def append_history(
+    record: Dict[str, Any],
+    history_file: Optional[Path] = None,
+    log: Callable[[str], None] = print,
+) -> list:
+    """追加一条发布记录，返回追加后的完整历史
+
+    在文件锁内重新读取磁盘上的最新历史再追加，
+    多个进程同时发布时记录不会互相覆盖。
+    """
+    history_file = history_file or PUBLISH_HISTORY_FILE
+    with file_lock(history_file):
+        history = load_history(history_file, log=log)
+        history.append(record)
+        atomic_write_json(history_file, history)
+    return history
+
+
+def compute_file_hash(path: Path) -> str:
+    """流式计算文件内容的 SHA-256 哈希（用于去重）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _in_group(record: Dict[str, Any], group_id: Optional[str]) -> bool:
+    """记录是否属于指定星球（group_id 为 None 或记录没有星球字段时视为匹配）"""
+    return group_id is None or str(record.get("group_id", group_id)) == str(group_id)
+
+
+def find_published(
+    history: List[Dict[str, Any]],
+    content_hash: str,
+    group_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """按内容哈希查找已成功发布的历史记录（可限定星球），未找到返回 None"""
+    for record in reversed(history):
+        if (
+            record.get("content_hash") == content_hash
+            and record.get("status") != "topic_failed"
+            and _in_group(record, group_id)
+        ):
+            return record
+    return None
+
+
+def latest_by_source(history: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """来源文件 → 该文件最近一次成功发布（或更新）的记录"""
+    latest: Dict[str, Dict[str, Any]] = {}
+    for record in history:
+        source_file = record.get("source_file")
+        if source_file and record.get("status") != "topic_failed":
+            latest[source_file] = record
+    return latest
+
+
+def is_unchanged(record: Dict[str, Any], path: Path) -> bool:
+    """文件当前内容是否与记录一致（大小 + 修改时间相同时不读取文件）"""
+    stat = path.stat()
+    if record.get("source_size") != stat.st_size:
+        return False
+    if record.get("source_mtime") == stat.st_mtime:
+        return True
+    return record.get("content_hash") == compute_file_hash(path)
+
+
+def find_unchanged(
+    history: List[Dict[str, Any]], path: Path, group_id: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """查找与文件当前内容一致的发布记录（传入 group_id 时只查该星球的记录）
+
+    先比较来源路径 + 大小 + 修改时间（无需读取文件）；
+    只有存在大小相同的记录时才流式计算内容哈希比对。
+    """
+    stat = path.stat()
+    source_file = str(path.resolve())
+    same_size = []
+    for record in reversed(history):
+        if record.get("status") == "topic_failed" or not _in_group(record, group_id):
+            continue
+        if record.get("source_size") != stat.st_size:
+            continue
+        if (
+            record.get("source_file") == source_file
+            and record.get("source_mtime") == stat.st_mtime
+        ):
+            return record
+        same_size.append(record)
+
+    if not same_size:
+        return None
+    return find_published(same_size[::-1], compute_file_hash(path))
@@ -4,57 +4,89 @@
 
 使用 Selenium 打开知识星球登录页面，等待用户扫码登录，
 成功后提取 Cookie 并持久化到 auth.json。
+
+浏览器使用持久化的用户数据目录（data/browser_profile），
+浏览器里的会话仍然有效时，先以无头模式静默刷新 Cookie，无需重新扫码。
+登录状态通过 DevTools 网络事件（Set-Cookie 响应头、页面跳转）检测，
+不再每 2 秒轮询一次 Cookie。
 """
 
 import json
+import re
 import time
 from datetime import datetime
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
 
-from config import AUTH_FILE
+from config import AUTH_FILE, BROWSER_PROFILE_DIR
+from storage import atomic_write_json, file_lock
 
 
 LOGIN_URL = "https://wx.zsxq.com/login"
 POST_LOGIN_URL_PREFIX = "https://wx.zsxq.com/"
 COOKIE_NAME = "zsxq_access_token"
 MAX_WAIT_SECONDS = 120
+SILENT_WAIT_SECONDS = 15
+EVENT_DRAIN_INTERVAL = 0.25
+
+_SET_COOKIE_RE = re.compile(COOKIE_NAME + r"=([^;\s]+)")
 
 
-def browser_login(headless: bool = False, timeout: int = MAX_WAIT_SECONDS) -> bool:
+def browser_login(
+    headless: bool = False,
+    timeout: int = MAX_WAIT_SECONDS,
+    use_profile: bool = True,
+    silent_only: bool = False,
+    auth_file: Optional[Path] = None,
+    profile_dir: Optional[Path] = None,
+) -> bool:
     """打开浏览器登录知识星球，登录成功后保存 Cookie
 
     Args:
         headless: 是否无头模式（默认否，需要用户扫码）
         timeout: 最大等待时间（秒）
+        use_profile: 是否使用持久化浏览器配置目录（可静默刷新）
+        silent_only: 只尝试静默刷新，失败时不打开扫码窗口（无人值守场景）
+        auth_file: Cookie 保存路径（默认使用用户配置，多账号时各账号独立）
+        profile_dir: 浏览器配置目录（默认 data/browser_profile）
 
     Returns:
         True 表示登录成功并已保存，False 表示失败或超时
     """
-    driver = _create_driver(headless)
+    auth_file = auth_file or AUTH_FILE
+    profile_dir = (profile_dir or BROWSER_PROFILE_DIR) if use_profile else None
+
+    rejected = None
+    if profile_dir is not None and profile_dir.exists():
+        refreshed, rejected = _silent_refresh(profile_dir, auth_file)
+        if refreshed:
+            return True
+        if silent_only:
+            print("[login] 静默刷新失败，需要扫码登录")
+            return False
+    elif silent_only:
+        print("[login] 没有可用的浏览器会话，需要先扫码登录一次")
+        return False
+
+    driver = _create_driver(headless, profile_dir)
     if driver is None:
         return False
 
     try:
         print(f"[login] 正在打开登录页面: {LOGIN_URL}")
+        _enable_network_events(driver)
         driver.get(LOGIN_URL)
         print(f"[login] 请在浏览器中扫码登录（{timeout}秒超时）...")
 
-        # 等待登录成功（检测 cookie 出现）
-        token = _wait_for_login(driver, timeout)
+        # 等待登录成功（监听 Set-Cookie / 页面跳转事件），
+        # 配置目录里已被接口拒绝的旧 Cookie 不算登录成功
+        token = _wait_for_login(driver, timeout, rejected=rejected)
 
         if not token:
             print("[login] 登录超时或失败")
             return False
 
-        # 提取完整信息
-        cookies = _extract_cookies(driver)
-        headers = _extract_headers(driver)
-
-        # 保存到 auth.json
-        _save_auth(cookies, headers)
-
-        print(f"[login] 登录成功！Cookie 已保存到 {AUTH_FILE}")
-        print(f"[login] zsxq_access_token: {token[:20]}...")
+        _persist_login(driver, token, auth_file)
         return True
 
     except Exception as e:
@@ -65,22 +97,98 @@ def browser_login(headless: bool = False, timeout: int = MAX_WAIT_SECONDS) -> bo
         driver.quit()
 
 
-def _create_driver(headless: bool = False) -> Optional[Any]:
+def _silent_refresh(profile_dir: Path, auth_file: Path) -> Tuple[bool, Optional[str]]:
+    """用持久化配置目录以无头模式打开星球，会话有效时直接保存 Cookie
+
+    Returns:
+        (是否成功, 被接口拒绝的 token)，扫码登录时不再接受被拒绝的 token
+    """
+    from auth import check_auth_status
+
+    print("[login] 尝试使用已保存的浏览器会话静默刷新...")
+    driver = _create_driver(True, profile_dir, quiet=True)
+    if driver is None:
+        return False, None
+
+    try:
+        _enable_network_events(driver)
+        driver.get(POST_LOGIN_URL_PREFIX)
+        token = _wait_for_login(driver, SILENT_WAIT_SECONDS, quiet=True)
+        if not token:
+            return False, None
+
+        cookies = _extract_cookies(driver)
+        headers = _extract_headers(driver)
+        if not check_auth_status(cookies, headers):
+            return False, cookies.get(COOKIE_NAME, token)
+
+        _persist_login(driver, token, auth_file, cookies=cookies, headers=headers)
+        print("[login] 静默刷新成功，无需扫码")
+        return True, None
+
+    except Exception as e:
+        print(f"[login] 静默刷新失败: {e}")
+        return False, None
+
+    finally:
+        driver.quit()
+
+
+def _persist_login(
+    driver: Any,
+    token: str,
+    auth_file: Path,
+    cookies: Optional[Dict[str, str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
+    """提取 Cookie 和请求头并保存到 auth.json"""
+    cookies = cookies or _extract_cookies(driver)
+    headers = headers or _extract_headers(driver)
+    cookies.setdefault(COOKIE_NAME, token)
+
+    _save_auth(cookies, headers, auth_file)
+
+    print(f"[login] 登录成功！Cookie 已保存到 {auth_file}")
+    print(f"[login] zsxq_access_token: {token[:20]}...")
+
+
+def _create_driver(
+    headless: bool = False,
+    profile_dir: Optional[Path] = None,
+    quiet: bool = False,
+) -> Optional[Any]:
     """创建 Selenium WebDriver（优先 Chrome，回退 Edge）"""
-    driver = _try_chrome(headless)
+    driver = _try_chrome(headless, profile_dir)
     if driver:
         return driver
 
-    driver = _try_edge(headless)
+    driver = _try_edge(headless, profile_dir)
     if driver:
         return driver
 
-    print("[login] 未找到可用的浏览器（需要 Chrome 或 Edge）")
-    print("[login] 请安装 Chrome: https://www.google.com/chrome/")
+    if not quiet:
+        print("[login] 未找到可用的浏览器（需要 Chrome 或 Edge）")
+        print("[login] 请安装 Chrome: https://www.google.com/chrome/")
     return None
 
 
-def _try_chrome(headless: bool) -> Optional[Any]:
+def _apply_common_options(
+    options: Any, headless: bool, profile_dir: Optional[Path], log_prefs_key: str
+) -> None:
+    """Chrome / Edge 共用的启动参数"""
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=500,700")
+    if profile_dir is not None:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    # 开启 performance 日志，用于接收 DevTools 网络事件
+    options.set_capability(log_prefs_key, {"performance": "ALL"})
+
+
+def _try_chrome(headless: bool, profile_dir: Optional[Path] = None) -> Optional[Any]:
     """尝试创建 Chrome WebDriver"""
     try:
         from selenium import webdriver
@@ -88,11 +196,7 @@ def _try_chrome(headless: bool) -> Optional[Any]:
         from selenium.webdriver.chrome.service import Service
 
         options = Options()
-        if headless:
-            options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=500,700")
+        _apply_common_options(options, headless, profile_dir, "goog:loggingPrefs")
 
         service = Service()
         driver = webdriver.Chrome(service=service, options=options)
@@ -101,7 +205,7 @@ def _try_chrome(headless: bool) -> Optional[Any]:
         return None
 
 
-def _try_edge(headless: bool) -> Optional[Any]:
+def _try_edge(headless: bool, profile_dir: Optional[Path] = None) -> Optional[Any]:
     """尝试创建 Edge WebDriver"""
     try:
         from selenium import webdriver
@@ -109,11 +213,7 @@ def _try_edge(headless: bool) -> Optional[Any]:
         from selenium.webdriver.edge.service import Service
 
         options = Options()
-        if headless:
-            options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=500,700")
+        _apply_common_options(options, headless, profile_dir, "ms:loggingPrefs")
 
         service = Service()
         driver = webdriver.Edge(service=service, options=options)
@@ -122,28 +222,99 @@ def _try_edge(headless: bool) -> Optional[Any]:
         return None
 
 
-def _wait_for_login(driver: Any, timeout: int) -> Optional[str]:
-    """轮询等待登录成功，返回 access_token 或 None"""
+def _enable_network_events(driver: Any) -> None:
+    """通过 CDP 开启 Network 域事件（不支持时静默忽略）"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+    except Exception:
+        pass
+
+
+def _token_from_events(driver: Any) -> Optional[str]:
+    """消费积压的 DevTools 事件
+
+    返回值:
+        Set-Cookie 中出现的 token；
+        没有 token 但发生了页面跳转/响应时返回空字符串（需要检查 Cookie）；
+        没有任何相关事件时返回 None
+    """
+    saw_activity = None
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError, TypeError):
+            continue
+        method = message.get("method", "")
+        params = message.get("params", {})
+
+        if method == "Network.responseReceivedExtraInfo":
+            headers = params.get("headers", {})
+            for name, value in headers.items():
+                if name.lower() == "set-cookie":
+                    match = _SET_COOKIE_RE.search(value)
+                    if match and match.group(1):
+                        return match.group(1)
+            saw_activity = ""
+        elif method in ("Page.frameNavigated", "Network.responseReceived"):
+            saw_activity = ""
+    return saw_activity
+
+
+def _cookie_token(driver: Any, rejected: Optional[str] = None) -> Optional[str]:
+    """从浏览器 Cookie 中读取 token（等于 rejected 的视为没有）"""
+    for cookie in driver.get_cookies():
+        if cookie.get("name") == COOKIE_NAME:
+            value = cookie.get("value", "")
+            if value and value != rejected:
+                return value
+    return None
+
+
+def _wait_for_login(
+    driver: Any, timeout: int, quiet: bool = False, rejected: Optional[str] = None
+) -> Optional[str]:
+    """等待登录成功，返回 access_token 或 None
+
+    优先监听 DevTools 网络事件：响应头 Set-Cookie 带上 token 时立即返回，
+    有页面跳转或响应时才读取一次 Cookie（覆盖由脚本写入 Cookie 的情况）。
+    浏览器不支持 performance 日志时回退为短间隔轮询 Cookie。
+    rejected 为已被接口拒绝的 token，等到出现新的 token 才返回。
+    """
     start = time.time()
     last_msg_time = start
+    events_supported = True
+
+    # 已有会话（持久化配置目录）时 Cookie 可能已经存在
+    token = _cookie_token(driver, rejected)
+    if token:
+        return token
 
     while time.time() - start < timeout:
-        # 检查 cookie
-        cookies = driver.get_cookies()
-        for cookie in cookies:
-            if cookie.get("name") == COOKIE_NAME:
-                value = cookie.get("value", "")
-                if value:
-                    return value
+        if events_supported:
+            try:
+                event_token = _token_from_events(driver)
+            except Exception:
+                events_supported = False
+                event_token = ""
+            if event_token and event_token != rejected:
+                return event_token
+            if event_token is not None:
+                token = _cookie_token(driver, rejected)
+                if token:
+                    return token
+        else:
+            token = _cookie_token(driver, rejected)
+            if token:
+                return token
 
         # 每 15 秒提醒一次
         elapsed = time.time() - start
-        if elapsed - (last_msg_time - start) >= 15:
+        if not quiet and elapsed - (last_msg_time - start) >= 15:
             remaining = timeout - int(elapsed)
             print(f"[login] 等待扫码中... 剩余 {remaining} 秒")
             last_msg_time = time.time()
 
-        time.sleep(2)
+        time.sleep(EVENT_DRAIN_INTERVAL if events_supported else 0.5)
 
     return None
 
@@ -159,8 +330,13 @@ def _extract_cookies(driver: Any) -> Dict[str, str]:
 
 
 def _extract_headers(driver: Any) -> Dict[str, str]:
-    """提取浏览器 User-Agent 等信息作为请求头"""
+    """提取浏览器 User-Agent 等信息作为请求头
+
+    无头模式（静默刷新）的 User-Agent 带有 HeadlessChrome 标识，
+    保存为普通 Chrome 的 User-Agent，与扫码登录时一致。
+    """
     user_agent = driver.execute_script("return navigator.userAgent")
+    user_agent = user_agent.replace("HeadlessChrome", "Chrome")
     return {
         "User-Agent": user_agent,
         "Referer": "https://wx.zsxq.com/",
@@ -168,15 +344,19 @@ def _extract_headers(driver: Any) -> Dict[str, str]:
     }
 
 
-def _save_auth(cookies: Dict[str, str], headers: Dict[str, str]) -> None:
+def _save_auth(
+    cookies: Dict[str, str],
+    headers: Dict[str, str],
+    auth_file: Optional[Path] = None,
+) -> None:
     """保存认证信息到 auth.json"""
+    auth_file = auth_file or AUTH_FILE
     auth_data = {
         "cookies": cookies,
         "headers": headers,
         "update_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
 
-    AUTH_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(AUTH_FILE, "w", encoding="utf-8") as f:
-        json.dump(auth_data, f, ensure_ascii=False, indent=2)
+    # 加锁 + 原子写入，并发运行的发布进程不会读到写了一半的 auth.json
+    with file_lock(auth_file):
+        atomic_write_json(auth_file, auth_data)
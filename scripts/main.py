@@ -6,15 +6,55 @@
   main.py setup                          首次配置（星球ID、认证路径）
   main.py login                          浏览器登录授权
   main.py publish --file <path>          发布文件（自动判断话题/文章）
+  main.py batch <path...>                批量发布（未变更的文件自动跳过）
+  main.py batch <path...> --near-dup     同时跳过与发布历史近似重复的文件
+  main.py batch <path...> --manifest <m> 记录每个文件的进度，中断后可继续
+  main.py resume <manifest>              从清单继续中断的批量发布
+  main.py enqueue <queue.db> <path...>   把文件加入多机共享的发布队列
+  main.py work <queue.db>                领取并发布队列中的文件（多台机器可同时运行）
+  main.py publish-stream < posts.jsonl   从标准输入逐行读取 JSON 发布，逐行输出结果
   main.py topic --text <text> [--tags t] 发布话题（短内容）
   main.py article --file <path>          发布文章（长内容）
+  main.py update <path...>               增量更新内容变更过的已发布文章
+  main.py watch <dir>                    监听目录，自动发布新增/修改的 Markdown
+  main.py list <path...>                 列出文件的发布计划（不发布）
+  main.py render <path...> --out <dir>   离线渲染请求体 JSON（不发布）
+  main.py validate <path...>             发布前本地校验（不发布）
   main.py history                        查看发布历史
   main.py check-auth                     检查认证状态
+
+全局选项（放在子命令之前）:
+  --profile <名称>                       使用命名账号（认证、星球、历史、限流各自独立）
+  --record <cassette.json>               录制本次运行的 HTTP 请求/响应
+  --replay <cassette.json>               回放录制的响应（不联网，不写发布历史）
 """
 
 import argparse
 import json
 import sys
+import tempfile
+from pathlib import Path
+
+
+def _similarity_threshold(value):
+    """argparse 类型: 0~1 之间的相似度阈值"""
+    threshold = float(value)
+    if not 0 < threshold <= 1:
+        raise argparse.ArgumentTypeError(f"相似度阈值必须在 0~1 之间: {value}")
+    return threshold
+
+
+def _add_near_dup_argument(subparser):
+    from config import NEAR_DUPLICATE_THRESHOLD
+
+    subparser.add_argument(
+        "--near-dup",
+        nargs="?",
+        const=NEAR_DUPLICATE_THRESHOLD,
+        type=_similarity_threshold,
+        metavar="THRESHOLD",
+        help=f"跳过与发布历史近似重复的内容（相似度阈值，默认 {NEAR_DUPLICATE_THRESHOLD}）",
+    )
 
 
 def _ensure_configured():
@@ -24,68 +64,464 @@ def _ensure_configured():
     get_user_config()
 
 
+def _open_transport(args):
+    """根据 --record / --replay 创建 HTTP 传输层（默认返回 None，使用真实会话）"""
+    if args.replay:
+        from cassette import ReplayTransport
+
+        return ReplayTransport(args.replay, latency_scale=args.latency_scale)
+    if args.record:
+        from cassette import RecordingTransport
+
+        return RecordingTransport(args.record)
+    return None
+
+
+def _publisher(args, profile=None):
+    """创建指定账号（默认为 --profile）的发布器
+
+    回放模式下认证信息和发布历史都使用临时目录中的文件，
+    不需要真实的 auth.json，也不会写入真实的发布历史。
+    """
+    from publisher import ZsxqPublisher
+
+    profile = profile or args.profile
+    options = {
+        "session": args.transport,
+        "near_duplicate_threshold": getattr(args, "near_dup", None),
+    }
+    if not args.replay:
+        return ZsxqPublisher.from_profile(profile, **options)
+
+    replay_dir = Path(args.replay_dir) / (profile or "default")
+    return ZsxqPublisher.from_profile(
+        profile,
+        auth_file=_replay_auth_file(args, profile),
+        history_file=replay_dir / "publish_history.json",
+        **options,
+    )
+
+
+def _replay_auth_file(args, profile=None):
+    """回放模式下使用的占位 auth.json（位于临时目录，令牌已脱敏）"""
+    from cassette import SCRUBBED
+    from storage import atomic_write_json
+
+    auth_file = Path(args.replay_dir) / (profile or "default") / "auth.json"
+    if not auth_file.exists():
+        atomic_write_json(
+            auth_file, {"cookies": {"zsxq_access_token": SCRUBBED}, "headers": {}}
+        )
+    return auth_file
+
+
 def cmd_setup(args):
     """首次配置或重新配置"""
     from config import setup_wizard
 
-    setup_wizard()
+    try:
+        setup_wizard(args.profile)
+    except ValueError as e:
+        print(f"[error] {e}")
+        return 1
     return 0
 
 
 def cmd_publish(args):
     """发布文件（自动判断模式）"""
-    from publisher import ZsxqPublisher
-
-    pub = ZsxqPublisher()
+    pub = _publisher(args)
     tags = args.tags.split(",") if args.tags else None
     result = pub.publish_file(args.file, mode="auto", tags=tags)
     return 0 if result.get("succeeded") else 1
 
 
+def _batch_exit_code(results):
+    if any(r["status"] == "circuit_open" for r in results):
+        return 2
+    failed = ("failed", "invalid", "topic_failed")
+    return 1 if any(r["status"] in failed for r in results) else 0
+
+
+def cmd_batch(args):
+    """批量发布文件/目录（内容未变更的自动跳过，多个账号并行）"""
+    from batch import print_batch_summary, publish_by_profile
+    from checkpoint import Checkpoint
+    from planner import collect_markdown_files
+
+    try:
+        paths = collect_markdown_files(args.paths)
+    except FileNotFoundError as e:
+        print(f"[error] {e}")
+        return 1
+
+    options = {
+        "mode": args.mode,
+        "tags": args.tags.split(",") if args.tags else None,
+        "interval": args.interval,
+        "jobs": args.jobs,
+        "prefetch": args.prefetch,
+        "max_concurrency": args.max_concurrency,
+    }
+    checkpoint = None
+    if args.manifest:
+        # 清单中记录绝对路径，resume 时不受工作目录影响
+        paths = [path.resolve() for path in paths]
+        try:
+            checkpoint = Checkpoint.create(
+                args.manifest,
+                paths,
+                dict(options, profile=args.profile, near_dup=args.near_dup),
+            )
+        except FileExistsError as e:
+            print(f"[error] {e}")
+            return 1
+
+    metrics = {}
+    results = publish_by_profile(
+        lambda profile: _publisher(args, profile),
+        paths,
+        default_profile=args.profile,
+        metrics=metrics,
+        checkpoint=checkpoint,
+        **options,
+    )
+    print_batch_summary(results, metrics)
+    return _batch_exit_code(results)
+
+
+def cmd_resume(args):
+    """从检查点清单继续中断的批量发布（已完成的文件不再读取）"""
+    from batch import print_batch_summary, publish_by_profile
+    from checkpoint import Checkpoint
+
+    try:
+        checkpoint = Checkpoint.load(args.manifest)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[error] {e}")
+        return 1
+
+    options = dict(checkpoint.options)
+    # 沿用批量发布时的账号和近似重复阈值
+    args.profile = args.profile or options.pop("profile", None)
+    args.near_dup = options.pop("near_dup", None)
+    done = {r["path"]: r for r in checkpoint.results()}
+    paths = checkpoint.paths(exclude_done=True)
+    print(f"清单共 {len(done) + len(paths)} 个文件，已完成 {len(done)} 个，继续 {len(paths)} 个")
+
+    metrics = {}
+    results = []
+    if paths:
+        results = publish_by_profile(
+            lambda profile: _publisher(args, profile),
+            paths,
+            default_profile=args.profile,
+            metrics=metrics,
+            checkpoint=checkpoint,
+            **options,
+        )
+    done.update((r["path"], r) for r in results)
+    results = [done[str(path)] for path in checkpoint.paths()]
+    print_batch_summary(results, metrics)
+    return _batch_exit_code(results)
+
+
+def cmd_enqueue(args):
+    """把文件加入共享发布队列（已在队列中的忽略）"""
+    from planner import collect_markdown_files
+    from workqueue import WorkQueue
+
+    try:
+        paths = collect_markdown_files(args.paths)
+    except FileNotFoundError as e:
+        print(f"[error] {e}")
+        return 1
+
+    queue = WorkQueue(args.queue)
+    # 队列中记录绝对路径，各机器需在同一路径挂载共享目录
+    added = queue.add([path.resolve() for path in paths])
+    counts = queue.counts()
+    print(f"加入 {added} 个文件（{len(paths) - added} 个已在队列中）")
+    print("队列: " + "，".join(f"{state} {n}" for state, n in sorted(counts.items())))
+    return 0
+
+
+def cmd_work(args):
+    """领取并发布共享队列中的文件，直到队列清空"""
+    from batch import print_batch_summary
+    from workqueue import WorkQueue, default_worker_id, drain_queue
+
+    try:
+        queue = WorkQueue(args.queue, lease_seconds=args.lease)
+    except ValueError as e:
+        print(f"[error] {e}")
+        return 1
+
+    pub = _publisher(args)
+    with pub:
+        results = drain_queue(
+            pub,
+            queue,
+            args.worker or default_worker_id(args.profile),
+            claim_size=args.claim,
+            mode=args.mode,
+            tags=args.tags.split(",") if args.tags else None,
+            interval=args.interval,
+            max_concurrency=args.max_concurrency,
+        )
+    print_batch_summary(results, heading="队列发布完成（本机）")
+    counts = queue.counts()
+    print("队列: " + "，".join(f"{state} {n}" for state, n in sorted(counts.items())))
+    return _batch_exit_code(results)
+
+
+def cmd_update(args):
+    """增量更新: 只更新发布后内容变更过的文章（按账号分组）"""
+    from batch import print_batch_summary, split_by_profile, update_batch
+    from planner import collect_markdown_files
+
+    try:
+        paths = collect_markdown_files(args.paths)
+    except FileNotFoundError as e:
+        print(f"[error] {e}")
+        return 1
+
+    by_path = {}
+    for profile, group in split_by_profile(paths, args.profile).items():
+        try:
+            pub = _publisher(args, profile)
+        except ValueError as e:
+            print(f"  [ERROR] {e}")
+            for path in group:
+                by_path[str(path)] = {"path": str(path), "status": "failed"}
+            continue
+        with pub:
+            items = update_batch(
+                pub, group, interval=args.interval, dry_run=args.dry_run
+            )
+        for item in items:
+            item["profile"] = profile or "default"
+            by_path[item["path"]] = item
+    results = [by_path[str(path)] for path in paths]
+
+    if args.dry_run:
+        for item in results:
+            if item["status"] == "changed":
+                print(f"  [changed] {item['path']}（文章ID: {item['article_id']}）")
+    print_batch_summary(results, heading="增量更新完成")
+    return _batch_exit_code(results)
+
+
+def cmd_publish_stream(args):
+    """从标准输入读取 JSONL 逐篇发布，每行输出一行 JSON 结果"""
+    from stream import publish_stream
+
+    pub = _publisher(args)
+    # 标准输出只写结果行，进度信息改写到标准错误
+    pub.log_file = sys.stderr
+    tags = args.tags.split(",") if args.tags else None
+    with pub:
+        counts = publish_stream(
+            pub,
+            sys.stdin,
+            sys.stdout,
+            log=sys.stderr,
+            mode=args.mode,
+            tags=tags,
+            interval=args.interval,
+            max_concurrency=args.max_concurrency,
+        )
+    summary = ", ".join(f"{k} {v}" for k, v in sorted(counts.items()))
+    print(f"\n流式发布完成: 共 {sum(counts.values())} 篇（{summary}）", file=sys.stderr)
+
+    if counts.get("circuit_open"):
+        return 2
+    failed = ("failed", "invalid", "topic_failed")
+    return 1 if any(counts.get(status) for status in failed) else 0
+
+
 def cmd_topic(args):
     """发布话题"""
-    from publisher import ZsxqPublisher
-
-    pub = ZsxqPublisher()
+    pub = _publisher(args)
     tags = args.tags.split(",") if args.tags else None
 
+    title = args.title or ""
+
     if args.file:
-        from pathlib import Path
+        from frontmatter import MarkdownSource
 
-        text = Path(args.file).read_text(encoding="utf-8")
+        source = MarkdownSource(args.file)
+        text = source.read_body()
+        title = title or source.meta.get("title", "")
+        tags = tags or source.meta.get("tags")
     elif args.text:
         text = args.text
     else:
         print("[error] 请提供 --text 或 --file 参数")
         return 1
 
-    result = pub.publish_topic(text, title=args.title or "", tags=tags)
+    result = pub.publish_topic(text, title=title, tags=tags)
     return 0 if result.get("succeeded") else 1
 
 
 def cmd_article(args):
     """发布文章"""
-    from publisher import ZsxqPublisher
-
-    pub = ZsxqPublisher()
+    pub = _publisher(args)
     tags = args.tags.split(",") if args.tags else None
 
     if not args.file:
         print("[error] 文章模式必须提供 --file 参数")
         return 1
 
-    from pathlib import Path
+    from frontmatter import MarkdownSource
 
-    md_content = Path(args.file).read_text(encoding="utf-8")
-    result = pub.publish_article(md_content, title=args.title or "", tags=tags)
+    source = MarkdownSource(args.file)
+    md_content = source.read_body()
+    title = args.title or source.meta.get("title", "")
+    tags = tags or source.meta.get("tags")
+    result = pub.publish_article(md_content, title=title, tags=tags)
     return 0 if result.get("succeeded") else 1
 
 
+def cmd_watch(args):
+    """监听目录并自动发布新增/修改的 Markdown 文件"""
+    from batch import print_batch_summary, publish_by_profile
+    from watcher import watch_directory
+
+    tags = args.tags.split(",") if args.tags else None
+    # 各账号的发布器在多次变更之间复用（保留熔断状态和已加载的历史）
+    publishers = {}
+
+    def get_publisher(profile):
+        if profile not in publishers:
+            publishers[profile] = _publisher(args, profile)
+        return publishers[profile]
+
+    def on_batch(paths):
+        print(f"\n[watch] 检测到 {len(paths)} 个文件变更")
+        results = publish_by_profile(
+            get_publisher,
+            paths,
+            default_profile=args.profile,
+            mode=args.mode,
+            tags=tags,
+        )
+        print_batch_summary(results)
+
+    try:
+        watch_directory(
+            args.dir,
+            on_batch,
+            debounce=args.debounce,
+            poll_interval=args.interval,
+            force_polling=args.poll,
+            initial_scan=args.initial,
+        )
+    except NotADirectoryError as e:
+        print(f"[error] {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("\n[watch] 已停止监听")
+    return 0
+
+
+def cmd_list(args):
+    """列出一批文件的发布计划（只读取文件头部）"""
+    from config import get_profile
+    from history import load_history
+    from planner import plan_files
+
+    history = load_history(get_profile(args.profile)["history_file"])
+    try:
+        items = plan_files(args.paths, mode=args.mode, history=history)
+    except FileNotFoundError as e:
+        print(f"[error] {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(items, ensure_ascii=False, indent=2))
+        return 0
+
+    if not items:
+        print("未找到 Markdown 文件")
+        return 0
+
+    for i, item in enumerate(items, 1):
+        print(f"  {i}. [{item['status']}] {item['path']}")
+        if item["status"] == "error":
+            print(f"     错误: {item['error']}")
+            print()
+            continue
+        print(f"     标题: {item['title']}")
+        print(f"     模式: {item['mode']}  大小: {item['size']} 字节")
+        if item["tags"]:
+            print(f"     标签: {', '.join(item['tags'])}")
+        if item["groups"]:
+            print(f"     星球: {', '.join(item['groups'])}")
+        if item.get("schedule"):
+            print(f"     计划时间: {item['schedule']}")
+        if item.get("profile"):
+            print(f"     账号: {item['profile']}")
+        print()
+
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    summary = ", ".join(f"{k} {v}" for k, v in sorted(counts.items()))
+    print(f"共 {len(items)} 个文件: {summary}")
+    return 1 if counts.get("error") else 0
+
+
+def cmd_render(args):
+    """离线渲染请求体到输出目录（不发起网络请求）"""
+    from render import render_paths
+
+    tags = args.tags.split(",") if args.tags else None
+    try:
+        results = render_paths(
+            args.paths,
+            args.out,
+            mode=args.mode,
+            tags=tags,
+            jobs=args.jobs,
+            profile=args.profile,
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[error] {e}")
+        return 1
+
+    failed = [r for r in results if r.get("error")]
+    for r in failed:
+        print(f"  [FAIL] {r['source']}: {r['error']}")
+    print(f"渲染完成: {len(results) - len(failed)} 成功, {len(failed)} 失败")
+    print(f"输出目录: {args.out}")
+    return 1 if failed else 0
+
+
+def cmd_validate(args):
+    """发布前本地校验（一次性报告全部问题，不发起网络请求）"""
+    from validator import validate_paths
+
+    tags = args.tags.split(",") if args.tags else None
+    try:
+        results = validate_paths(
+            args.paths, mode=args.mode, tags=tags, jobs=args.jobs
+        )
+    except FileNotFoundError as e:
+        print(f"[error] {e}")
+        return 1
+
+    failed = [r for r in results if r["violations"]]
+    for r in failed:
+        print(f"  [FAIL] {r['source']}")
+        for violation in r["violations"]:
+            print(f"    - {violation}")
+    print(f"校验完成: {len(results) - len(failed)} 通过, {len(failed)} 未通过")
+    return 1 if failed else 0
+
+
 def cmd_history(args):
     """查看发布历史"""
-    from publisher import ZsxqPublisher
-
-    pub = ZsxqPublisher()
+    pub = _publisher(args)
     records = pub.get_history(count=args.count)
 
     if not records:
@@ -107,9 +543,15 @@ def cmd_history(args):
 def cmd_check_auth(args):
     """检查认证状态"""
     from auth import load_auth, check_auth_status
+    from config import build_endpoints, get_profile
 
+    profile = get_profile(args.profile)
+    if args.replay:
+        auth_file = _replay_auth_file(args, args.profile)
+    else:
+        auth_file = profile["auth_file"]
     try:
-        cookies, headers = load_auth()
+        cookies, headers = load_auth(auth_file)
         print("[OK] auth.json 加载成功")
         print(f"  access_token: {cookies.get('zsxq_access_token', '?')[:20]}...")
     except Exception as e:
@@ -118,7 +560,10 @@ def cmd_check_auth(args):
         return 1
 
     print("正在验证认证有效性...")
-    if check_auth_status(cookies, headers):
+    endpoints = build_endpoints(profile["group_id"], profile["api_base"])
+    if check_auth_status(
+        cookies, headers, session=args.transport, settings_url=endpoints["settings"]
+    ):
         print("[OK] 认证有效")
         return 0
     else:
@@ -129,13 +574,24 @@ def cmd_check_auth(args):
 
 def cmd_login(args):
     """浏览器登录授权"""
+    from config import get_profile
     from login import browser_login
 
+    profile = get_profile(args.profile)
     print("启动浏览器登录知识星球...")
-    print("请在弹出的浏览器窗口中扫码登录\n")
+    if args.profile:
+        print(f"账号: {profile['name']}")
+    if not args.silent_only:
+        print("浏览器会话失效时，请在弹出的浏览器窗口中扫码登录\n")
 
     timeout = args.timeout if hasattr(args, "timeout") else 120
-    success = browser_login(timeout=timeout)
+    success = browser_login(
+        timeout=timeout,
+        use_profile=not args.no_profile,
+        silent_only=args.silent_only,
+        auth_file=profile["auth_file"],
+        profile_dir=profile["browser_profile_dir"],
+    )
 
     if success:
         # 登录后验证
@@ -143,7 +599,7 @@ def cmd_login(args):
         from auth import load_auth, check_auth_status
 
         try:
-            cookies, headers = load_auth()
+            cookies, headers = load_auth(profile["auth_file"])
             if check_auth_status(cookies, headers):
                 print("[OK] 认证验证通过，可以正常发布了！")
                 return 0
@@ -163,6 +619,22 @@ def main():
         description="知识星球内容发布工具",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
+    parser.add_argument(
+        "--profile", metavar="NAME", help="使用 user_config.json 中的命名账号"
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record", metavar="CASSETTE", help="录制 HTTP 请求/响应到 cassette 文件"
+    )
+    cassette_group.add_argument(
+        "--replay", metavar="CASSETTE", help="从 cassette 文件回放响应（不联网）"
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="回放耗时缩放比例（默认1，0 表示不等待）",
+    )
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
 
     # setup 命令
@@ -173,8 +645,121 @@ def main():
     p_publish = subparsers.add_parser("publish", help="发布文件（自动判断模式）")
     p_publish.add_argument("--file", "-f", required=True, help="Markdown 文件路径")
     p_publish.add_argument("--tags", "-t", help="标签（逗号分隔）")
+    _add_near_dup_argument(p_publish)
     p_publish.set_defaults(func=cmd_publish)
 
+    # batch 命令
+    p_batch = subparsers.add_parser("batch", help="批量发布文件/目录")
+    p_batch.add_argument("paths", nargs="+", help="Markdown 文件或目录")
+    p_batch.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="发布模式（默认 auto）",
+    )
+    p_batch.add_argument("--tags", "-t", help="标签（逗号分隔）")
+    p_batch.add_argument(
+        "--interval", type=float, default=3.0, help="发布间隔（秒，默认3）"
+    )
+    p_batch.add_argument(
+        "--jobs", "-j", type=int, help="提前准备文件的进程数（默认 CPU 核数，最多4）"
+    )
+    p_batch.add_argument(
+        "--prefetch", type=int, help="最多提前准备的文件数（默认进程数的2倍）"
+    )
+    p_batch.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=1,
+        help="最多同时发送的文件数，大于1时按响应耗时和限流信号自动调整（默认1，按间隔顺序发送）",
+    )
+    p_batch.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="写入检查点清单，记录每个文件的进度（中断后用 resume 继续）",
+    )
+    _add_near_dup_argument(p_batch)
+    p_batch.set_defaults(func=cmd_batch)
+
+    # resume 命令
+    p_resume = subparsers.add_parser("resume", help="从检查点清单继续中断的批量发布")
+    p_resume.add_argument("manifest", help="batch --manifest 写入的清单文件")
+    p_resume.set_defaults(func=cmd_resume)
+
+    # enqueue 命令
+    p_enqueue = subparsers.add_parser("enqueue", help="把文件加入多机共享的发布队列")
+    p_enqueue.add_argument("queue", help="队列文件（SQLite，放在共享卷上）")
+    p_enqueue.add_argument("paths", nargs="+", help="Markdown 文件或目录")
+    p_enqueue.set_defaults(func=cmd_enqueue)
+
+    # work 命令
+    p_work = subparsers.add_parser("work", help="领取并发布共享队列中的文件")
+    p_work.add_argument("queue", help="enqueue 使用的队列文件")
+    p_work.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="发布模式（默认 auto）",
+    )
+    p_work.add_argument("--tags", "-t", help="标签（逗号分隔）")
+    p_work.add_argument(
+        "--interval", type=float, default=3.0, help="发布间隔（秒，默认3）"
+    )
+    p_work.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=1,
+        help="最多同时发送的文件数，大于1时自动调整（默认1，按间隔顺序发送）",
+    )
+    p_work.add_argument(
+        "--claim", type=int, default=10, help="每次领取的文件数（默认10）"
+    )
+    p_work.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        help="租约时长（秒，默认300），发布器失联超过此时间后文件由其他发布器接手",
+    )
+    p_work.add_argument("--worker", help="发布器标识（默认 主机名:进程号:账号）")
+    _add_near_dup_argument(p_work)
+    p_work.set_defaults(func=cmd_work)
+
+    # update 命令
+    p_update = subparsers.add_parser(
+        "update", aliases=["sync-out"], help="增量更新内容变更过的已发布文章"
+    )
+    p_update.add_argument("paths", nargs="+", help="Markdown 文件或目录")
+    p_update.add_argument(
+        "--interval", type=float, default=3.0, help="更新间隔（秒，默认3）"
+    )
+    p_update.add_argument(
+        "--dry-run", action="store_true", help="只列出需要更新的文件，不发送请求"
+    )
+    p_update.set_defaults(func=cmd_update)
+
+    # publish-stream 命令
+    p_stream = subparsers.add_parser(
+        "publish-stream", help="从标准输入读取 JSONL 逐篇发布（每行输出一行 JSON 结果）"
+    )
+    p_stream.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="输入行未指定 mode 时的发布模式（默认 auto）",
+    )
+    p_stream.add_argument("--tags", "-t", help="附加到每篇的标签（逗号分隔）")
+    p_stream.add_argument(
+        "--interval", type=float, default=3.0, help="发布间隔（秒，默认3）"
+    )
+    p_stream.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=1,
+        help="最多同时发送的帖子数，大于1时自动调整（默认1，按间隔顺序发送）",
+    )
+    _add_near_dup_argument(p_stream)
+    p_stream.set_defaults(func=cmd_publish_stream)
+
     # topic 命令
     p_topic = subparsers.add_parser("topic", help="发布话题（短内容）")
     p_topic.add_argument("--text", help="话题文本内容")
@@ -190,6 +775,72 @@ def main():
     p_article.add_argument("--tags", "-t", help="标签（逗号分隔）")
     p_article.set_defaults(func=cmd_article)
 
+    # watch 命令
+    p_watch = subparsers.add_parser("watch", help="监听目录，自动发布新增/修改的文件")
+    p_watch.add_argument("dir", help="监听的目录")
+    p_watch.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="发布模式（默认 auto）",
+    )
+    p_watch.add_argument("--tags", "-t", help="标签（逗号分隔）")
+    p_watch.add_argument(
+        "--debounce", type=float, default=2.0, help="去抖时间（秒，默认2）"
+    )
+    p_watch.add_argument(
+        "--interval", type=float, default=3.0, help="轮询间隔（秒，默认3）"
+    )
+    p_watch.add_argument("--poll", action="store_true", help="强制使用轮询模式")
+    p_watch.add_argument(
+        "--initial", action="store_true", help="启动时处理目录中已有的文件"
+    )
+    _add_near_dup_argument(p_watch)
+    p_watch.set_defaults(func=cmd_watch)
+
+    # list 命令
+    p_list = subparsers.add_parser("list", help="列出文件的发布计划（不发布）")
+    p_list.add_argument("paths", nargs="+", help="Markdown 文件或目录")
+    p_list.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="发布模式（默认 auto）",
+    )
+    p_list.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+    p_list.set_defaults(func=cmd_list)
+
+    # render 命令
+    p_render = subparsers.add_parser("render", help="离线渲染请求体（不发布）")
+    p_render.add_argument("paths", nargs="+", help="Markdown 文件或目录")
+    p_render.add_argument("--out", "-o", required=True, help="输出目录")
+    p_render.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="发布模式（默认 auto）",
+    )
+    p_render.add_argument("--tags", "-t", help="标签（逗号分隔）")
+    p_render.add_argument(
+        "--jobs", "-j", type=int, help="并行进程数（默认 CPU 核数）"
+    )
+    p_render.set_defaults(func=cmd_render)
+
+    # validate 命令
+    p_validate = subparsers.add_parser("validate", help="发布前本地校验（不发布）")
+    p_validate.add_argument("paths", nargs="+", help="Markdown 文件或目录")
+    p_validate.add_argument(
+        "--mode",
+        choices=["auto", "topic", "article"],
+        default="auto",
+        help="发布模式（默认 auto）",
+    )
+    p_validate.add_argument("--tags", "-t", help="标签（逗号分隔）")
+    p_validate.add_argument(
+        "--jobs", "-j", type=int, help="并行进程数（默认 CPU 核数）"
+    )
+    p_validate.set_defaults(func=cmd_validate)
+
     # history 命令
     p_history = subparsers.add_parser("history", help="查看发布历史")
     p_history.add_argument("--count", "-n", type=int, default=10, help="显示条数")
@@ -204,6 +855,16 @@ def main():
     p_login.add_argument(
         "--timeout", type=int, default=120, help="登录超时时间（秒，默认120）"
     )
+    p_login.add_argument(
+        "--silent-only",
+        action="store_true",
+        help="只尝试用已保存的浏览器会话静默刷新，不打开扫码窗口",
+    )
+    p_login.add_argument(
+        "--no-profile",
+        action="store_true",
+        help="不使用持久化浏览器配置目录（每次全新会话）",
+    )
     p_login.set_defaults(func=cmd_login)
 
     args = parser.parse_args()
@@ -212,7 +873,33 @@ def main():
         parser.print_help()
         return 1
 
-    return args.func(args)
+    if args.profile and args.command != "setup":
+        from config import get_profile
+
+        try:
+            get_profile(args.profile)
+        except ValueError as e:
+            print(f"[error] {e}")
+            print("提示: 运行 --profile <名称> setup 添加账号")
+            return 1
+
+    try:
+        args.transport = _open_transport(args)
+    except (OSError, ValueError) as e:
+        print(f"[error] 无法打开 cassette: {e}")
+        return 1
+
+    try:
+        if args.replay:
+            with tempfile.TemporaryDirectory(prefix="zsxq-replay-") as tmp:
+                args.replay_dir = tmp
+                return args.func(args)
+        return args.func(args)
+    finally:
+        if args.transport is not None:
+            args.transport.close()
+            if args.record:
+                print(f"[cassette] 已录制到 {args.record}")
 
 
 if __name__ == "__main__":
@@ -8,22 +8,92 @@
 """
 
 import re
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 from urllib.parse import quote
 
-
-def markdown_to_article_html(md_text: str) -> str:
-    """将 Markdown 转换为知识星球文章 HTML 格式"""
+_HEADING_RE = re.compile(r"^#{1,3}\s+(.+)$")
+# 与 markdown 库 fenced_code 扩展识别的开始标记一致（语言名不含逗号等字符）
+_FENCE_OPEN_RE = re.compile(
+    r"^(~{3,}|`{3,})[ ]*(\{.*\}|\.?[\w#.+-]*[ ]*(hl_lines=([\"']).*?\4[ ]*)?)$"
+)
+# 空行之后以这些开头的行可能属于上一个块（缩进、列表、引用、定义列表）
+_CONTINUATION_RE = re.compile(r"^(\s|[-*+>:]|\d+[.)]\s)")
+# 出现以下内容时不能分块转换: 引用式链接/脚注/缩写定义（可被全文任意位置引用）、
+# 行首的原始 HTML 块（可跨越空行）
+_UNCHUNKABLE_RE = re.compile(
+    r"^\s{0,3}(\*?\[[^\]\n]+\]:|<[a-zA-Z!/])", re.MULTILINE
+)
+
+MARKDOWN_EXTENSIONS = ["extra", "nl2br", "sane_lists"]
+MARKDOWN_CHUNK_CHARS = 256 * 1024
+
+
+def markdown_to_article_html(
+    md_text: str, chunk_chars: Optional[int] = None
+) -> str:
+    """将 Markdown 转换为知识星球文章 HTML 格式
+
+    Args:
+        md_text: Markdown 正文
+        chunk_chars: 大文件模式下按块转换的块大小（字符数）。
+            markdown 库会为整篇文档构建元素树，按块转换可让峰值内存
+            只与块大小相关；文档含引用式链接/脚注定义或原始 HTML 块时仍整篇转换。
+    """
     try:
         import markdown
-        html = markdown.markdown(
-            md_text,
-            extensions=["extra", "nl2br", "sane_lists"],
-        )
     except ImportError:
-        html = _simple_md_to_html(md_text)
+        return _simple_md_to_html(md_text)
+
+    if not chunk_chars or len(md_text) <= chunk_chars or _UNCHUNKABLE_RE.search(
+        md_text
+    ):
+        return markdown.markdown(md_text, extensions=MARKDOWN_EXTENSIONS)
+
+    converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    parts = []
+    for chunk in _iter_markdown_chunks(md_text, chunk_chars):
+        parts.append(converter.convert(chunk))
+        converter.reset()
+    return "\n".join(parts)
 
-    return html
+
+def _iter_markdown_chunks(md_text: str, chunk_chars: int) -> Iterator[str]:
+    """按块边界切分 Markdown: 只在代码块之外、空行之后开始新块的位置切分"""
+    start = 0
+    pos = 0
+    length = len(md_text)
+    fence = None
+    prev_blank = False
+
+    while pos < length:
+        end = md_text.find("\n", pos)
+        if end == -1:
+            end = length
+        line = md_text[pos:end]
+        blank = not line.strip()
+
+        if (
+            pos - start >= chunk_chars
+            and fence is None
+            and prev_blank
+            and not blank
+            and not _CONTINUATION_RE.match(line)
+        ):
+            yield md_text[start:pos]
+            start = pos
+
+        if fence is None:
+            match = _FENCE_OPEN_RE.match(line)
+            if match:
+                fence = match.group(1)
+        elif line.rstrip(" ") == fence:
+            fence = None
+
+        prev_blank = blank
+        pos = end + 1
+
+    if start < length:
+        yield md_text[start:]
 
 
 def markdown_to_topic_text(md_text: str, title: str = "") -> str:
@@ -52,31 +122,33 @@ def markdown_to_topic_text(md_text: str, title: str = "") -> str:
 def extract_title_from_markdown(md_text: str) -> Tuple[str, str]:
     """从 Markdown 中提取标题和正文
 
+    只扫描到第一个非空行，不对全文按行切分。
+
     Returns:
         (title, body) 元组
     """
-    lines = md_text.strip().split("\n")
+    pos = 0
+    length = len(md_text)
+
+    while pos < length:
+        end = md_text.find("\n", pos)
+        if end == -1:
+            end = length
+        stripped = md_text[pos:end].strip()
+        if stripped:
+            # 第一个非空行: # 标题 或普通文本都作为标题
+            return title_from_line(stripped), md_text[end + 1:].strip()
+        pos = end + 1
 
-    title = ""
-    body_start = 0
+    return "", ""
 
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        # 匹配 # 标题
-        match = re.match(r"^#{1,3}\s+(.+)$", stripped)
-        if match:
-            title = match.group(1).strip()
-            body_start = i + 1
-            break
-        # 跳过空行
-        if stripped:
-            # 第一个非空非标题行作为标题
-            title = stripped
-            body_start = i + 1
-            break
 
-    body = "\n".join(lines[body_start:]).strip()
-    return title, body
+def title_from_line(stripped: str) -> str:
+    """从首个非空行得到标题（匹配 # 标题 时去掉标记，否则原样作为标题）"""
+    match = _HEADING_RE.match(stripped)
+    if match:
+        return match.group(1).strip()
+    return stripped
 
 
 def format_hashtags(tags: List[str]) -> str:
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 请求体构建模块
+
+发布流程和离线渲染（render 命令）共用这里的函数构建请求体，
+保证渲染结果与实际发送的内容完全一致。
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import ARTICLE_THRESHOLD, LARGE_FILE_THRESHOLD
+from markdown_converter import (
+    MARKDOWN_CHUNK_CHARS,
+    extract_title_from_markdown,
+    markdown_to_article_html,
+    markdown_to_topic_text,
+    format_hashtags,
+)
+
+ARTICLE_SUMMARY_LENGTH = 200
+# 提取标题和摘要时只扫描正文开头的字符数
+SUMMARY_SCAN_CHARS = 64 * 1024
+DEFAULT_ARTICLE_TITLE = "未命名文章"
+
+
+def build_topic_payload(
+    text: str,
+    title: str = "",
+    tags: Optional[List[str]] = None,
+    article_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """构建话题请求体（传入 article_id 时为引用文章的话题）"""
+    topic_text = markdown_to_topic_text(text, title=title)
+
+    if tags:
+        topic_text += "\n" + format_hashtags(tags)
+
+    req_data = {"type": "talk", "text": topic_text}
+    if article_id is not None:
+        req_data["article_id"] = article_id
+    return {"req_data": req_data}
+
+
+def build_article_payload(md_content: str, title: str) -> Dict[str, Any]:
+    """构建创建文章请求体（大文件分块转换 HTML，限制峰值内存）"""
+    large = len(md_content) > LARGE_FILE_THRESHOLD
+    chunk_chars = MARKDOWN_CHUNK_CHARS if large else None
+    return {
+        "req_data": {
+            "title": title,
+            "content": markdown_to_article_html(md_content, chunk_chars=chunk_chars),
+        }
+    }
+
+
+def article_summary(body: str) -> str:
+    """文章引用话题中的摘要（正文前 200 字符）"""
+    return body[:ARTICLE_SUMMARY_LENGTH] if body else ""
+
+
+def title_and_summary(md_content: str) -> Tuple[str, str]:
+    """从正文开头提取标题和摘要，不复制整篇正文"""
+    title, body = extract_title_from_markdown(md_content[:SUMMARY_SCAN_CHARS])
+    return title, article_summary(body)
+
+
+def resolve_mode(mode: str, meta: Dict[str, Any], md_content: str) -> str:
+    """确定发布模式: 命令行指定 > front matter > 按长度自动判断"""
+    if mode == "auto":
+        mode = meta.get("mode", "auto")
+    if mode == "auto":
+        mode = "article" if len(md_content) > ARTICLE_THRESHOLD else "topic"
+    return mode
+
+
+def merge_tags(*tag_lists: Optional[List[str]]) -> Optional[List[str]]:
+    """合并多组标签并去重（保持顺序）"""
+    merged: List[str] = []
+    for tags in tag_lists:
+        for tag in tags or []:
+            if tag not in merged:
+                merged.append(tag)
+    return merged or None
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 批量规划模块
+
+对一批 Markdown 文件生成发布计划（标题、模式、标签、目标星球、状态），
+只读取 front matter 和文件头部，不加载正文。
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import ARTICLE_THRESHOLD
+from frontmatter import MarkdownSource, is_scheduled_later
+from history import find_unchanged, is_unchanged
+from watcher import is_markdown_file, iter_markdown_files
+
+
+def collect_markdown_files(paths: List[str]) -> List[Path]:
+    """展开文件/目录参数为 Markdown 文件列表（目录递归，结果排序去重）"""
+    files = set()
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.update(p.resolve() for p in iter_markdown_files(path))
+        elif path.is_file() and is_markdown_file(path):
+            files.add(path.resolve())
+        elif not path.exists():
+            raise FileNotFoundError(f"文件不存在: {raw}")
+    return sorted(files)
+
+
+def plan_file(
+    path: Path, mode: str = "auto", history: Optional[list] = None
+) -> Dict[str, Any]:
+    """生成单个文件的发布计划
+
+    status 取值: pending（待发布）、scheduled（未到计划时间）、
+    unchanged（内容已发布过）、error（front matter 有误）
+    """
+    source = MarkdownSource(path)
+    item: Dict[str, Any] = {"path": str(path), "status": "pending"}
+
+    try:
+        meta = source.meta
+    except ValueError as e:
+        item.update(status="error", error=str(e))
+        return item
+
+    item.update(
+        title=source.title,
+        mode=source.resolve_mode(mode, ARTICLE_THRESHOLD) or "auto",
+        size=source.body_size,
+        tags=meta.get("tags", []),
+        groups=meta.get("groups", []),
+    )
+    if meta.get("schedule"):
+        item["schedule"] = meta["schedule"].isoformat()
+    if meta.get("profile"):
+        item["profile"] = meta["profile"]
+
+    if is_scheduled_later(meta):
+        item["status"] = "scheduled"
+    elif history:
+        # 多个星球时每个星球都发布过才算未变更
+        records = [
+            find_unchanged(history, path, group_id=group_id)
+            for group_id in meta.get("groups") or [None]
+        ]
+        if all(records):
+            item["status"] = "unchanged"
+            item["published_at"] = records[-1].get("timestamp")
+
+    return item
+
+
+def plan_update(path: Path, latest: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """生成单个文件的增量更新计划
+
+    Args:
+        path: Markdown 文件
+        latest: history.latest_by_source 的结果
+
+    status 取值: changed（文章内容已变更，待更新）、unchanged（未变更）、
+    new（未发布过）、topic（以话题发布，不支持编辑）
+    """
+    item: Dict[str, Any] = {"path": str(path)}
+    record = latest.get(str(path.resolve()))
+    if record is None:
+        item["status"] = "new"
+        return item
+
+    item.update(
+        article_id=record.get("article_id"),
+        topic_id=record.get("topic_id"),
+        published_at=record.get("timestamp"),
+    )
+    if is_unchanged(record, path):
+        item["status"] = "unchanged"
+    elif not record.get("article_id"):
+        item["status"] = "topic"
+    else:
+        item["status"] = "changed"
+    return item
+
+
+def plan_files(
+    paths: List[str], mode: str = "auto", history: Optional[list] = None
+) -> List[Dict[str, Any]]:
+    """生成一批文件的发布计划"""
+    return [plan_file(p, mode, history) for p in collect_markdown_files(paths)]
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 发布准备模块
+
+把一个 Markdown 文件准备成可以直接发送的数据: 读取正文、计算内容哈希、
+确定发布模式、转换文章 HTML、本地校验。这一步不依赖认证和网络，
+批量发布时在工作进程中提前完成，与主线程等待网络响应重叠进行。
+不经过文件的内容（如 publish-stream 从标准输入读取的帖子）用 prepare_text。
+"""
+
+import hashlib
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fingerprint import format_fingerprint, simhash
+from frontmatter import MarkdownSource
+from history import compute_file_hash
+from payloads import (
+    DEFAULT_ARTICLE_TITLE,
+    build_article_payload,
+    merge_tags,
+    resolve_mode,
+    title_and_summary,
+)
+from validator import check_markdown
+
+
+def prepare_file(
+    file_path: str, mode: str = "auto", tags: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """读取、转换并校验文件，返回 publish_prepared 使用的数据
+
+    返回字段: path/title/tags/groups/mode/auto_mode/size/record_extra/violations，
+    record_extra 中含正文的 SimHash 指纹（近似重复检测），
+    话题模式另有 text，文章模式另有 body（摘要，只取正文开头）和 article_payload。
+    """
+    path = Path(file_path)
+    source = MarkdownSource(path)
+    meta = source.meta
+
+    stat = path.stat()
+    record_extra = {
+        "source_file": str(path.resolve()),
+        "content_hash": compute_file_hash(path),
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+    }
+
+    return prepare_text(
+        source.read_body(),
+        title=source.title,
+        mode=mode,
+        tags=merge_tags(tags, meta.get("tags")),
+        meta=meta,
+        path=str(path),
+        base_dir=path.parent,
+        record_extra=record_extra,
+    )
+
+
+def prepare_text(
+    md_content: str,
+    title: str = "",
+    mode: str = "auto",
+    tags: Optional[List[str]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    path: str = "",
+    base_dir: Optional[Path] = None,
+    record_extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """转换并校验一段 Markdown 正文，返回字段与 prepare_file 相同
+
+    Args:
+        md_content: Markdown 正文
+        title: 标题（文章模式为空时从正文提取）
+        mode: 发布模式
+        tags: 标签
+        meta: front matter（mode/groups）
+        path: 日志中显示的来源（文件路径或 stdin:<行号>）
+        base_dir: 相对链接的基准目录（为空时不检查本地链接）
+        record_extra: 附加写入发布历史的字段，未提供 content_hash 时按正文计算
+    """
+    meta = meta or {}
+    record_extra = dict(record_extra or {})
+    if "content_hash" not in record_extra:
+        record_extra["content_hash"] = hashlib.sha256(
+            md_content.encode("utf-8")
+        ).hexdigest()
+    record_extra["simhash"] = format_fingerprint(simhash(md_content))
+    resolved = resolve_mode(mode, meta, md_content)
+
+    prepared: Dict[str, Any] = {
+        "path": path,
+        "title": title,
+        "tags": tags,
+        "groups": meta.get("groups"),
+        "mode": resolved,
+        "auto_mode": mode == "auto",
+        "size": len(md_content),
+        "record_extra": record_extra,
+        "violations": check_markdown(md_content, resolved, base_dir=base_dir),
+    }
+    if prepared["violations"]:
+        return prepared
+
+    if resolved == "article":
+        extracted_title, summary = title_and_summary(md_content)
+        title = title or extracted_title or DEFAULT_ARTICLE_TITLE
+        prepared["title"] = title
+        prepared["body"] = summary
+        prepared["article_payload"] = build_article_payload(md_content, title)
+    else:
+        prepared["text"] = md_content
+    return prepared
+
+
+def prepare_job(
+    job: Tuple[str, str, Optional[List[str]]]
+) -> Dict[str, Any]:
+    """进程池任务: 准备文件，出错时返回 error，附带耗时"""
+    path, mode, tags = job
+    start = time.perf_counter()
+    try:
+        prepared = prepare_file(path, mode=mode, tags=tags)
+    except Exception as e:
+        prepared = {"path": path, "error": str(e)}
+    prepared["prepare_seconds"] = time.perf_counter() - start
+    return prepared
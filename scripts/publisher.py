@@ -8,32 +8,239 @@
 """
 
 import json
+import threading
 import time
 import random
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, TextIO
 
 import requests
 
-from config import ENDPOINTS, GROUP_ID, PUBLISH_HISTORY_FILE
+from config import (
+    API_THROTTLE_CODES,
+    AUTH_FILE,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    COMPRESS_REQUESTS,
+    DEFAULT_PROFILE,
+    GROUP_ID,
+    HTTP2,
+    REQUEST_TIMEOUTS,
+    TIMEOUT_OVERRIDES,
+    article_endpoint,
+    build_endpoints,
+    get_profile,
+    topic_endpoint,
+)
 from auth import load_auth, build_request_headers
-from markdown_converter import (
-    markdown_to_article_html,
-    markdown_to_topic_text,
-    extract_title_from_markdown,
-    format_hashtags,
+from breaker import CircuitBreaker
+from fingerprint import SimHashIndex
+from frontmatter import MarkdownSource, is_scheduled_later
+from history import append_history, find_published, find_unchanged, load_history
+from payloads import (
+    DEFAULT_ARTICLE_TITLE,
+    article_summary,
+    build_article_payload,
+    build_topic_payload,
+    title_and_summary,
+)
+from prepare import prepare_file
+from throttle import AdaptiveConcurrency, RateLimiter
+from transport import (
+    HttpxSession,
+    compression_rejected,
+    endpoint_name,
+    gzip_json,
+    resolve_timeouts,
 )
+from validator import check_article_payload, check_markdown, check_topic_payload
 
+# 熔断期间未发送的请求返回该结果，批量任务据此标记为可稍后继续
+CIRCUIT_OPEN_RESULT = {"succeeded": False, "status": "circuit_open"}
 
-class ZsxqPublisher:
-    """知识星球内容发布器"""
 
-    def __init__(self):
-        self.cookies, self.base_headers = load_auth()
-        self.history = self._load_history()
+class ZsxqPublisher:
+    """知识星球内容发布器
+
+    认证信息和发布历史在第一次使用时才加载；HTTP 请求复用同一个
+    requests.Session（连接池），用完调用 close() 或使用 with 语句。
+    """
+
+    def __init__(
+        self,
+        group_id: Optional[str] = None,
+        auth_file: Optional[Path] = None,
+        history_file: Optional[Path] = None,
+        verbose: bool = True,
+        session: Any = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        log_prefix: str = "",
+        near_duplicate_threshold: Optional[float] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        log_file: Optional[TextIO] = None,
+        timeouts: Optional[Dict[str, Any]] = None,
+        compress: Optional[bool] = None,
+        http2: Optional[bool] = None,
+        api_base: Optional[str] = None,
+    ):
+        """
+        Args:
+            group_id: 星球ID（默认使用用户配置）
+            auth_file: auth.json 路径（默认使用用户配置）
+            history_file: 发布历史文件路径（默认 data/publish_history.json）
+            verbose: 是否打印进度信息
+            session: 外部传入的 HTTP 会话/传输层（如 cassette 录制回放），
+                由调用方负责关闭
+            rate_limiter: 账号级限流器（每次发送请求前取令牌）
+            log_prefix: 进度信息前缀（多个账号并行发布时区分输出）
+            near_duplicate_threshold: 近似重复检测的相似度阈值（0~1），
+                与历史记录相似度达到阈值的文件跳过发布；为空时不检测
+            concurrency: 自适应并发控制器（多个线程共用发布器时限制在途请求数）
+            log_file: 进度信息的输出位置（默认标准输出）
+            timeouts: 按接口覆盖的超时 {接口名称: (连接, 读取)}，覆盖
+                config.REQUEST_TIMEOUTS 加上用户配置的 timeouts（传入全部接口时
+                不再受用户配置影响）
+            compress: 是否 gzip 压缩请求体（默认用户配置的 compress_requests）
+            http2: 是否使用 HTTP/2（需要 httpx[http2]，默认用户配置的 http2）
+            api_base: 接口地址前缀（默认用户配置的 api_base）
+        Raises:
+            ValueError: 超时配置格式错误
+        """
+        self.group_id = group_id or GROUP_ID
+        self.auth_file = Path(auth_file) if auth_file else AUTH_FILE
+        self.history_file = Path(history_file) if history_file else None
+        self.verbose = verbose
+        self.rate_limiter = rate_limiter
+        self.log_prefix = log_prefix
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.concurrency = concurrency
+        self.log_file = log_file
+        self.timeouts = resolve_timeouts(
+            resolve_timeouts(REQUEST_TIMEOUTS, TIMEOUT_OVERRIDES), timeouts
+        )
+        self.compress = COMPRESS_REQUESTS if compress is None else compress
+        self.http2 = HTTP2 if http2 is None else http2
+        # 拒绝过压缩请求体的接口，之后不再压缩
+        self._uncompressed_endpoints: set = set()
+        self.api_base = api_base
+        self.endpoints = build_endpoints(self.group_id, api_base)
+        self.breaker = CircuitBreaker(
+            failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=CIRCUIT_RESET_SECONDS,
+            log=self._log,
+        )
+        # 最近写入的历史记录按线程保存，并发发送时各自取到自己的记录
+        self._local = threading.local()
+        self._auth: Optional[tuple] = None
+        self._history: Optional[list] = None
+        self._near_index: Optional[SimHashIndex] = None
+        # 并发发送时保护发布历史和近似重复索引
+        self._history_lock = threading.RLock()
+        self._session = session
+        self._owns_session = session is None
+
+    @classmethod
+    def from_profile(
+        cls, name: Optional[str] = None, **kwargs: Any
+    ) -> "ZsxqPublisher":
+        """按账号配置创建发布器（各账号独立的认证、历史、连接池和限流）
+
+        Raises:
+            ValueError: 账号不存在
+        """
+        profile = get_profile(name)
+        kwargs.setdefault("auth_file", profile["auth_file"])
+        kwargs.setdefault("history_file", profile["history_file"])
+        kwargs.setdefault("api_base", profile["api_base"])
+        if profile["rate_limit"]:
+            kwargs.setdefault(
+                "rate_limiter",
+                RateLimiter(float(profile["rate_limit"]), burst=profile["burst"]),
+            )
+        if name and profile["name"] != DEFAULT_PROFILE:
+            kwargs.setdefault("log_prefix", f"[{profile['name']}] ")
+        return cls(group_id=profile["group_id"] or None, **kwargs)
+
+    def __enter__(self) -> "ZsxqPublisher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭 HTTP 连接池（外部传入的 session 不关闭）"""
+        if self._session is not None and self._owns_session:
+            self._session.close()
+            self._session = None
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        return self._load_auth()[0]
+
+    @property
+    def base_headers(self) -> Dict[str, str]:
+        return self._load_auth()[1]
+
+    def _load_auth(self) -> tuple:
+        if self._auth is None:
+            self._auth = load_auth(self.auth_file)
+        return self._auth
+
+    def reload_auth(self) -> None:
+        """重新读取 auth.json（重新登录后调用）"""
+        self._auth = None
+
+    @property
+    def history(self) -> list:
+        with self._history_lock:
+            if self._history is None:
+                self._history = load_history(self.history_file, log=self._log)
+            return self._history
+
+    @history.setter
+    def history(self, value: list) -> None:
+        self._history = value
+
+    @property
+    def last_record(self) -> Optional[Dict[str, Any]]:
+        """当前线程最近一次写入发布历史的记录"""
+        return getattr(self._local, "last_record", None)
+
+    @last_record.setter
+    def last_record(self, value: Optional[Dict[str, Any]]) -> None:
+        self._local.last_record = value
+
+    @property
+    def near_duplicate_index(self) -> SimHashIndex:
+        """发布历史的 SimHash 分段索引（第一次使用时构建，发布后增量加入）"""
+        with self._history_lock:
+            if self._near_index is None:
+                self._near_index = SimHashIndex.from_history(
+                    self.history, self.near_duplicate_threshold
+                )
+            return self._near_index
+
+    @property
+    def session(self) -> Any:
+        if self._session is None:
+            if self.http2:
+                try:
+                    self._session = HttpxSession(http2=True)
+                except ImportError as e:
+                    self.http2 = False
+                    self._log(f"  [WARN] {e}，使用 HTTP/1.1")
+            if self._session is None:
+                self._session = requests.Session()
+        return self._session
 
     def publish_topic(
-        self, text: str, title: str = "", tags: Optional[List[str]] = None
+        self,
+        text: str,
+        title: str = "",
+        tags: Optional[List[str]] = None,
+        record_extra: Optional[Dict[str, Any]] = None,
+        group_id: str = "",
     ) -> Dict[str, Any]:
         """发布话题（短内容）
 
@@ -41,21 +248,23 @@ class ZsxqPublisher:
             text: 话题正文
             title: 可选标题（会加粗显示）
             tags: 可选标签列表
+            record_extra: 附加写入发布历史的字段（如来源文件、内容哈希）
+            group_id: 目标星球ID（默认使用配置中的星球）
         Returns:
             API 响应数据
         """
-        # 构建话题文本
-        topic_text = markdown_to_topic_text(text, title=title)
+        group_id = group_id or self.group_id
 
-        # 添加标签
-        if tags:
-            topic_text += "\n" + format_hashtags(tags)
+        # 构建请求体（话题文本 + 标签）
+        payload = build_topic_payload(text, title=title, tags=tags)
 
-        # 构建请求体
-        payload = {"req_data": {"type": "talk", "text": topic_text}}
+        # 与 validate 命令相同的校验（直接调用时也检查图片数量）
+        violations = check_markdown(text, "topic") + check_topic_payload(payload)
+        if violations:
+            return self._report_violations(violations)
 
         # 发送请求
-        result = self._post(ENDPOINTS["create_topic"], payload)
+        result = self._post(topic_endpoint(group_id, self.api_base), payload)
 
         if result and result.get("succeeded"):
             topic_data = result.get("resp_data", {}).get("topic", {})
@@ -64,19 +273,71 @@ class ZsxqPublisher:
                 title=title or text[:50],
                 topic_id=topic_data.get("topic_id"),
                 status=topic_data.get("process_status", "unknown"),
+                group_id=group_id,
+                **(record_extra or {}),
             )
-            print(f"  [OK] 话题发布成功!")
-            print(f"  话题ID: {topic_data.get('topic_id')}")
-            print(f"  状态: {topic_data.get('process_status', 'unknown')}")
+            self._log("  [OK] 话题发布成功!")
+            self._log(f"  话题ID: {topic_data.get('topic_id')}")
+            self._log(f"  状态: {topic_data.get('process_status', 'unknown')}")
         else:
-            print(f"  [FAIL] 话题发布失败")
+            self._log("  [FAIL] 话题发布失败")
             if result:
-                print(f"  响应: {json.dumps(result, ensure_ascii=False)}")
+                self._log(f"  响应: {json.dumps(result, ensure_ascii=False)}")
 
         return result or {}
 
+    def create_article(
+        self,
+        md_content: str,
+        title: str,
+        tags: Optional[List[str]] = None,
+        body: Optional[str] = None,
+        article_payload: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """创建文章（文章发布的 Step 1），返回 API 响应数据
+
+        创建前先校验文章和 Step 2 的引用话题，
+        避免文章创建成功后话题因超限失败而留下孤立文章。
+        body 为正文开头（用于摘要），为空时从 md_content 开头提取；
+        article_payload 为已转换好的请求体，为空时由 md_content 转换。
+        """
+        if article_payload is None:
+            article_payload = build_article_payload(md_content, title)
+
+        if body is None:
+            _, body = title_and_summary(md_content)
+        summary_payload = build_topic_payload(
+            article_summary(body), title=title, tags=tags, article_id=""
+        )
+        violations = check_article_payload(article_payload)
+        violations += check_topic_payload(summary_payload)
+        if violations:
+            return self._report_violations(violations)
+
+        self._log(f"  Step 1: 创建文章 '{title}'...")
+
+        article_result = self._post(self.endpoints["create_article"], article_payload)
+
+        if not article_result or not article_result.get("succeeded"):
+            self._log("  [FAIL] 文章创建失败")
+            if article_result:
+                self._log(f"  响应: {json.dumps(article_result, ensure_ascii=False)}")
+            return article_result or {}
+
+        self._log(f"  [OK] 文章已创建: {article_result['resp_data']['article_id']}")
+        self._log(f"  文章链接: {article_result['resp_data']['article_url']}")
+        return article_result
+
     def publish_article(
-        self, md_content: str, title: str = "", tags: Optional[List[str]] = None
+        self,
+        md_content: str,
+        title: str = "",
+        tags: Optional[List[str]] = None,
+        record_extra: Optional[Dict[str, Any]] = None,
+        group_id: str = "",
+        article_result: Optional[Dict[str, Any]] = None,
+        body: Optional[str] = None,
+        article_payload: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """发布文章（长内容，两步流程）
 
@@ -87,64 +348,51 @@ class ZsxqPublisher:
             md_content: Markdown 格式的文章内容
             title: 文章标题（如果为空，从 Markdown 中提取）
             tags: 可选标签列表
+            record_extra: 附加写入发布历史的字段（如来源文件、内容哈希）
+            group_id: 目标星球ID（默认使用配置中的星球）
+            article_result: 已创建文章的响应（传入时跳过 Step 1）
+            body: 正文开头（用于摘要，传入时不再扫描 md_content）
+            article_payload: 已转换好的创建文章请求体
         Returns:
             API 响应数据
         """
-        # 提取标题和正文
-        if not title:
-            title, body = extract_title_from_markdown(md_content)
-        else:
-            _, body = extract_title_from_markdown(md_content)
+        group_id = group_id or self.group_id
 
-        if not title:
-            title = "未命名文章"
+        # 提取标题和摘要（只扫描正文开头）
+        if body is None:
+            extracted_title, body = title_and_summary(md_content)
+            title = title or extracted_title
+        title = title or DEFAULT_ARTICLE_TITLE
 
         # Step 1: 创建文章
-        print(f"  Step 1: 创建文章 '{title}'...")
-        article_html = markdown_to_article_html(md_content)
-
-        article_payload = {
-            "req_data": {
-                "title": title,
-                "content": article_html,
-            }
-        }
+        if article_result is None:
+            article_result = self.create_article(
+                md_content,
+                title,
+                tags=tags,
+                body=body,
+                article_payload=article_payload,
+            )
+            if not article_result.get("succeeded"):
+                return article_result
 
-        article_result = self._post(ENDPOINTS["create_article"], article_payload)
-
-        if not article_result or not article_result.get("succeeded"):
-            print(f"  [FAIL] 文章创建失败")
-            if article_result:
-                print(f"  响应: {json.dumps(article_result, ensure_ascii=False)}")
-            return article_result or {}
+            # 适当延迟，避免请求过快
+            time.sleep(random.uniform(0.5, 1.5))
 
         article_id = article_result["resp_data"]["article_id"]
         article_url = article_result["resp_data"]["article_url"]
-        print(f"  [OK] 文章已创建: {article_id}")
-        print(f"  文章链接: {article_url}")
-
-        # 适当延迟，避免请求过快
-        time.sleep(random.uniform(0.5, 1.5))
 
         # Step 2: 创建话题引用文章
-        print(f"  Step 2: 创建话题引用文章...")
+        self._log("  Step 2: 创建话题引用文章...")
 
         # 构建话题文本（摘要 + 标签）
-        summary = body[:200] if body else ""
-        topic_text = markdown_to_topic_text(summary, title=title)
+        topic_payload = build_topic_payload(
+            article_summary(body), title=title, tags=tags, article_id=article_id
+        )
 
-        if tags:
-            topic_text += "\n" + format_hashtags(tags)
-
-        topic_payload = {
-            "req_data": {
-                "type": "talk",
-                "text": topic_text,
-                "article_id": article_id,
-            }
-        }
-
-        topic_result = self._post(ENDPOINTS["create_topic"], topic_payload)
+        topic_result = self._post(
+            topic_endpoint(group_id, self.api_base), topic_payload
+        )
 
         if topic_result and topic_result.get("succeeded"):
             topic_data = topic_result.get("resp_data", {}).get("topic", {})
@@ -155,119 +403,429 @@ class ZsxqPublisher:
                 article_id=article_id,
                 article_url=article_url,
                 status=topic_data.get("process_status", "unknown"),
+                group_id=group_id,
+                **(record_extra or {}),
             )
-            print(f"  [OK] 文章发布成功!")
-            print(f"  话题ID: {topic_data.get('topic_id')}")
-            print(f"  文章ID: {article_id}")
-            print(f"  文章链接: {article_url}")
-            print(f"  状态: {topic_data.get('process_status', 'unknown')}")
+            self._log("  [OK] 文章发布成功!")
+            self._log(f"  话题ID: {topic_data.get('topic_id')}")
+            self._log(f"  文章ID: {article_id}")
+            self._log(f"  文章链接: {article_url}")
+            self._log(f"  状态: {topic_data.get('process_status', 'unknown')}")
         else:
-            print(f"  [WARN] 文章已创建但话题关联失败")
-            print(f"  文章ID: {article_id} (可手动关联)")
+            self._log("  [WARN] 文章已创建但话题关联失败")
+            self._log(f"  文章ID: {article_id} (可手动关联)")
             self._record_history(
                 publish_type="article",
                 title=title,
                 article_id=article_id,
                 article_url=article_url,
                 status="topic_failed",
+                group_id=group_id,
+                **(record_extra or {}),
             )
+            # 保留已创建的文章，重试时只创建引用话题
+            return {
+                **(topic_result or {}),
+                "succeeded": False,
+                "status": "topic_failed",
+                "article_result": article_result,
+            }
 
-        return topic_result or article_result or {}
+        return topic_result
 
     def publish_file(
-        self, file_path: str, mode: str = "auto", tags: Optional[List[str]] = None
+        self,
+        file_path: str,
+        mode: str = "auto",
+        tags: Optional[List[str]] = None,
+        dedup: bool = False,
     ) -> Dict[str, Any]:
         """发布文件
 
+        文件头部的 front matter 可声明 title/tags/mode/groups/schedule，
+        命令行传入的 mode（非 auto）优先，标签与 front matter 合并。
+
         Args:
             file_path: Markdown 文件路径
             mode: 发布模式 - "auto" (自动判断), "topic" (话题), "article" (文章)
             tags: 可选标签列表
+            dedup: 为 True 时，内容未变更（已在发布历史中）的文件直接跳过
         """
-        from pathlib import Path
-        from config import ARTICLE_THRESHOLD
-
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"文件不存在: {file_path}")
 
-        md_content = path.read_text(encoding="utf-8")
-        title, _ = extract_title_from_markdown(md_content)
+        skipped = self.check_skip(path, dedup=dedup)
+        if skipped:
+            return skipped
+
+        return self.publish_prepared(
+            prepare_file(str(path), mode=mode, tags=tags), dedup=dedup
+        )
+
+    def check_skip(self, path: Path, dedup: bool = False) -> Optional[Dict[str, Any]]:
+        """发布前的跳过检查（熔断、计划时间、未变更），需要跳过时返回结果
+
+        只读取文件头部和发布历史，不读取正文。
+        """
+        if self.breaker.is_open():
+            self._log(f"API 熔断中，跳过: {path.name}（稍后重新运行即可继续）")
+            return dict(CIRCUIT_OPEN_RESULT)
+
+        meta = MarkdownSource(path).meta
+        if is_scheduled_later(meta):
+            scheduled = meta["schedule"].isoformat()
+            self._log(f"未到计划发布时间，跳过: {path.name}（{scheduled}）")
+            return {"skipped": True, "scheduled": scheduled}
+
+        if dedup:
+            # 多个星球时每个星球都发布过才跳过，部分失败的由 publish_prepared 补发
+            records = [
+                find_unchanged(self.history, path, group_id=group_id)
+                for group_id in meta.get("groups") or [self.group_id]
+            ]
+            if all(records):
+                record = records[-1]
+                published_at = record.get("timestamp", "?")
+                self._log(f"跳过未变更文件: {path.name}（已于 {published_at} 发布）")
+                content_hash = record.get("content_hash")
+                return {"skipped": True, "content_hash": content_hash}
+        return None
+
+    def publish_prepared(
+        self,
+        prepared: Dict[str, Any],
+        article_result: Optional[Dict[str, Any]] = None,
+        on_article_created: Optional[Callable[[Dict[str, Any]], None]] = None,
+        dedup: bool = False,
+    ) -> Dict[str, Any]:
+        """发送 prepare_file 准备好的文件（读取、转换、校验已完成）
 
-        print(f"发布文件: {path.name}")
-        print(f"标题: {title}")
-        print(f"字符数: {len(md_content)}")
+        Args:
+            prepared: prepare_file 的结果
+            article_result: 已创建文章的响应（中断后继续时传入，只执行 Step 2）
+            on_article_created: 文章创建成功后、创建引用话题前调用（记录检查点）
+            dedup: 为 True 时，已发布过该内容的星球不再发布（只补发失败的星球）
+        """
+        path = Path(prepared["path"])
+        if self.breaker.is_open():
+            self._log(f"API 熔断中，跳过: {path.name}（稍后重新运行即可继续）")
+            return dict(CIRCUIT_OPEN_RESULT)
+
+        mode = prepared["mode"]
+        title = prepared["title"]
+        tags = prepared["tags"]
+        record_extra = prepared["record_extra"]
+        group_ids = prepared["groups"] or [self.group_id]
+
+        self._log(f"发布文件: {path.name}")
+        self._log(f"标题: {title}")
+        self._log(f"字符数: {prepared['size']}")
+        if prepared["auto_mode"]:
+            self._log(f"自动选择模式: {mode}")
+
+        if prepared["violations"]:
+            return self._report_violations(prepared["violations"])
+
+        published = []
+        if dedup:
+            # 发送前按内容哈希再查一次历史: 上次发送成功但未来得及记录检查点时，
+            # 继续运行不会重复发布（单个星球同样检查）
+            content_hash = record_extra.get("content_hash")
+            published = [
+                record
+                for record in (
+                    find_published(self.history, content_hash, group_id=group_id)
+                    for group_id in group_ids
+                )
+                if record
+            ]
+            done = {str(record.get("group_id")) for record in published}
+            group_ids = [g for g in group_ids if str(g) not in done]
+            if not group_ids:
+                published_at = published[-1].get("timestamp", "?")
+                self._log(f"跳过已发布内容: {path.name}（已于 {published_at} 发布）")
+                return {"skipped": True, "content_hash": content_hash}
+            if published:
+                self._log(f"已发布到星球: {', '.join(sorted(done))}，只补发其余星球")
+
+        # 补发其余星球时内容与已发布的记录相同，不做近似重复检测
+        duplicate = None
+        if not published:
+            duplicate = self.find_near_duplicate(record_extra.get("simhash"))
+        if duplicate:
+            self._log(
+                f"跳过近似重复内容: {path.name}（与 {duplicate['timestamp']} 发布的"
+                f"「{duplicate['title']}」相似度 {duplicate['similarity']:.0%}）"
+            )
+            return {"skipped": True, "near_duplicate": duplicate}
+
+        if mode == "article" and article_result is None:
+            # 补发时沿用已发布星球引用的文章
+            for record in published:
+                if record.get("article_id"):
+                    article_result = {
+                        "succeeded": True,
+                        "resp_data": {
+                            "article_id": record["article_id"],
+                            "article_url": record.get("article_url"),
+                        },
+                    }
+                    break
+        if mode == "article" and article_result is None:
+            # 先创建文章，多个星球共用同一篇文章，只在各星球分别创建引用话题
+            article_result = self.create_article(
+                "",
+                title,
+                tags=tags,
+                body=prepared["body"],
+                article_payload=prepared["article_payload"],
+            )
+            if not article_result.get("succeeded"):
+                return article_result
+            if on_article_created is not None:
+                on_article_created(article_result)
+            # 适当延迟，避免请求过快
+            time.sleep(random.uniform(0.5, 1.5))
+        elif article_result is not None:
+            article_id = article_result["resp_data"]["article_id"]
+            self._log(f"  文章已创建，继续 Step 2: {article_id}")
+
+        results = []
+        for group_id in group_ids:
+            if len(group_ids) > 1:
+                self._log(f"目标星球: {group_id}")
+            if mode == "article":
+                result = self.publish_article(
+                    "",
+                    title=title,
+                    tags=tags,
+                    record_extra=record_extra,
+                    group_id=group_id,
+                    article_result=article_result,
+                    body=prepared["body"],
+                    article_payload=prepared["article_payload"],
+                )
+            else:
+                result = self.publish_topic(
+                    prepared["text"],
+                    title=title,
+                    tags=tags,
+                    record_extra=record_extra,
+                    group_id=group_id,
+                )
+            results.append(result)
+
+        if len(results) == 1:
+            return results[0]
+        combined = {
+            "succeeded": all(r.get("succeeded") for r in results),
+            "results": results,
+        }
+        if any(r.get("status") == "topic_failed" for r in results):
+            combined.update(status="topic_failed", article_result=article_result)
+        return combined
 
-        # 自动判断模式
-        if mode == "auto":
-            mode = "article" if len(md_content) > ARTICLE_THRESHOLD else "topic"
-            print(f"自动选择模式: {mode}")
+    def update_prepared(
+        self, prepared: Dict[str, Any], record: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """用 prepare_file(mode="article") 准备好的内容更新已发布的文章
 
-        if mode == "article":
-            return self.publish_article(md_content, title=title, tags=tags)
+        Args:
+            prepared: 准备好的文件（文章模式）
+            record: 该文件最近一次发布的历史记录（提供 article_id/topic_id）
+        """
+        path = Path(prepared["path"])
+        if self.breaker.is_open():
+            self._log(f"API 熔断中，跳过: {path.name}（稍后重新运行即可继续）")
+            return dict(CIRCUIT_OPEN_RESULT)
+
+        title = prepared["title"]
+        article_id = record["article_id"]
+        self._log(f"更新文章: {path.name}")
+        self._log(f"标题: {title}")
+        self._log(f"字符数: {prepared['size']}")
+
+        if prepared["violations"]:
+            return self._report_violations(prepared["violations"])
+        violations = check_article_payload(prepared["article_payload"])
+        if violations:
+            return self._report_violations(violations)
+
+        result = self._send(
+            "PUT",
+            article_endpoint(article_id, self.api_base),
+            prepared["article_payload"],
+        )
+        if result and result.get("succeeded"):
+            self._record_history(
+                publish_type="article",
+                title=title,
+                topic_id=record.get("topic_id"),
+                article_id=article_id,
+                article_url=record.get("article_url"),
+                status="updated",
+                group_id=record.get("group_id", self.group_id),
+                **prepared["record_extra"],
+            )
+            self._log(f"  [OK] 文章已更新: {article_id}")
         else:
-            return self.publish_topic(md_content, title=title, tags=tags)
+            self._log(f"  [FAIL] 文章更新失败: {article_id}")
+            if result:
+                self._log(f"  响应: {json.dumps(result, ensure_ascii=False)}")
+        return result or {}
+
+    def find_near_duplicate(
+        self, fingerprint: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """在发布历史中查找与指纹最相似的记录（未开启检测或未找到返回 None）"""
+        if self.near_duplicate_threshold is None or not fingerprint:
+            return None
+        matches = self.near_duplicate_index.query(int(fingerprint, 16))
+        if not matches:
+            return None
+        score, record = matches[0]
+        return {
+            "similarity": score,
+            "title": record.get("title", "?"),
+            "timestamp": record.get("timestamp", "?"),
+            "topic_id": record.get("topic_id"),
+            "source_file": record.get("source_file"),
+        }
 
     def _post(self, url: str, payload: Dict) -> Optional[Dict]:
         """发送 POST 请求"""
+        return self._send("POST", url, payload)
+
+    def _send(self, method: str, url: str, payload: Dict) -> Optional[Dict]:
+        """发送请求
+
+        熔断中直接返回 CIRCUIT_OPEN_RESULT，不发出请求；
+        超时、连接失败和 5xx 计入熔断器。
+        设置了并发控制器时，耗时和超时/429/5xx/限流错误码用于调整在途请求数。
+        """
+        if not self.breaker.allow_request():
+            self._log("  [ERROR] API 连续失败，已熔断，本次请求未发送")
+            return dict(CIRCUIT_OPEN_RESULT)
+
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            if self.concurrency is None:
+                return self._request(method, url, payload)[0]
+            started = self.concurrency.acquire()
+            congested = True
+            try:
+                result, congested = self._request(method, url, payload)
+            finally:
+                self.concurrency.release(started, congested)
+            return result
+        finally:
+            self.breaker.release_probe()
+
+    def _request(
+        self, method: str, url: str, payload: Dict, compress: Optional[bool] = None
+    ) -> tuple:
+        """发出请求，返回 (响应数据, 是否为拥塞信号)
+
+        超时按接口取自 self.timeouts；开启压缩时请求体 gzip 压缩，
+        服务器拒绝（415，或提到编码的 400）时不压缩重发一次，并记住该接口不支持压缩；
+        其他 400 按普通错误处理，不重发。
+        """
         headers = build_request_headers(self.base_headers)
+        endpoint = endpoint_name(method, url)
+        if compress is None:
+            compress = self.compress and endpoint not in self._uncompressed_endpoints
+        body = gzip_json(payload, headers) if compress else None
+        if body is None:
+            compress = False
+            body_options = {"json": payload}
+        else:
+            body_options = {"data": body}
 
         try:
-            resp = requests.post(
+            resp = self.session.request(
+                method,
                 url,
                 headers=headers,
                 cookies=self.cookies,
-                json=payload,
-                timeout=30,
+                timeout=self.timeouts.get(endpoint, self.timeouts["default"]),
+                **body_options,
             )
 
+            if compress and compression_rejected(resp.status_code, resp.text):
+                self._uncompressed_endpoints.add(endpoint)
+                self._log(f"  [WARN] 接口不接受压缩请求体（HTTP {resp.status_code}），改为不压缩重发")
+                return self._request(method, url, payload, compress=False)
+
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
             if resp.status_code == 200:
-                return resp.json()
+                data = resp.json()
+                throttled = (
+                    isinstance(data, dict)
+                    and not data.get("succeeded")
+                    and data.get("code") in API_THROTTLE_CODES
+                )
+                return data, throttled
             elif resp.status_code == 401:
-                print("  [ERROR] Cookie 已过期，请运行 login 命令重新登录授权")
-                return None
+                self._log("  [ERROR] Cookie 已过期，请运行 login 命令重新登录授权")
+                return None, False
             else:
-                print(f"  [ERROR] HTTP {resp.status_code}: {resp.text[:200]}")
-                return None
+                self._log(f"  [ERROR] HTTP {resp.status_code}: {resp.text[:200]}")
+                return None, resp.status_code == 429 or resp.status_code >= 500
 
         except requests.exceptions.Timeout:
-            print("  [ERROR] 请求超时")
-            return None
+            self.breaker.record_failure()
+            self._log("  [ERROR] 请求超时")
+            return None, True
         except requests.exceptions.ConnectionError:
-            print("  [ERROR] 网络连接失败")
-            return None
+            self.breaker.record_failure()
+            self._log("  [ERROR] 网络连接失败")
+            return None, True
         except Exception as e:
-            print(f"  [ERROR] 请求异常: {e}")
-            return None
+            self._log(f"  [ERROR] 请求异常: {e}")
+            return None, False
 
     def _record_history(self, **kwargs):
         """记录发布历史"""
         record = {
             "timestamp": datetime.now().isoformat(),
-            "group_id": GROUP_ID,
+            "group_id": self.group_id,
             **kwargs,
         }
-        self.history.append(record)
-        self._save_history()
-
-    def _load_history(self) -> list:
-        """加载发布历史"""
-        if PUBLISH_HISTORY_FILE.exists():
+        self.last_record = record
+        with self._history_lock:
             try:
-                with open(PUBLISH_HISTORY_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, Exception):
-                return []
-        return []
-
-    def _save_history(self):
-        """保存发布历史"""
-        try:
-            with open(PUBLISH_HISTORY_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"  [WARN] 保存发布历史失败: {e}")
+                self.history = append_history(
+                    record, self.history_file, log=self._log
+                )
+            except Exception as e:
+                self.history.append(record)
+                self._log(f"  [WARN] 保存发布历史失败: {e}")
+            if self._near_index is not None:
+                self._near_index.add_record(record)
 
     def get_history(self, count: int = 10) -> list:
         """获取最近的发布历史"""
         return self.history[-count:]
+
+    def _report_violations(self, violations: List[str]) -> Dict[str, Any]:
+        """打印校验失败信息，返回未发送请求的失败结果"""
+        self._log("  [FAIL] 发布前校验未通过（未发送任何请求）:")
+        for violation in violations:
+            self._log(f"    - {violation}")
+        return {"succeeded": False, "violations": violations}
+
+    def _log(self, message: str) -> None:
+        """输出进度信息（verbose=False 时静默）"""
+        if self.verbose:
+            if self.log_prefix:
+                # 多账号并行时一次写出整行，避免与其他线程的输出交错
+                print(self.log_prefix + message + "\n", end="", file=self.log_file)
+            else:
+                print(message, file=self.log_file)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 离线渲染模块
+
+把 Markdown 文件转换为 publish_topic / publish_article 将要发送的请求体，
+写入输出目录供发布前审阅，不发起任何网络请求。
+文件较多时使用进程池并行转换。
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import GROUP_ID, build_endpoints, get_profile, topic_endpoint
+from frontmatter import MarkdownSource
+from markdown_converter import format_hashtags
+from payloads import (
+    DEFAULT_ARTICLE_TITLE,
+    build_article_payload,
+    build_topic_payload,
+    merge_tags,
+    resolve_mode,
+    title_and_summary,
+)
+from planner import collect_markdown_files
+
+# 文章话题在发送前才知道 article_id，渲染结果中用占位符表示
+ARTICLE_ID_PLACEHOLDER = "<article_id>"
+
+
+def render_file(
+    file_path: str,
+    mode: str = "auto",
+    tags: Optional[List[str]] = None,
+    profile: Optional[str] = None,
+) -> Dict[str, Any]:
+    """渲染单个文件，返回与 publish_file 一致的请求序列
+
+    与发布时一样，front matter 的 profile 优先于参数 profile，
+    星球和接口地址取自该账号的配置。
+
+    Raises:
+        ValueError: 账号不存在
+    """
+    source = MarkdownSource(file_path)
+    meta = source.meta
+    md_content = source.read_body()
+    tags = merge_tags(tags, meta.get("tags"))
+    mode = resolve_mode(mode, meta, md_content)
+    account = get_profile(meta.get("profile") or profile)
+    api_base = account["api_base"]
+    default_group = account["group_id"] or GROUP_ID
+    group_ids = meta.get("groups") or [default_group]
+    endpoints = build_endpoints(default_group, api_base)
+
+    requests_: List[Dict[str, Any]] = []
+    if mode == "article":
+        extracted_title, summary = title_and_summary(md_content)
+        title = source.title or extracted_title or DEFAULT_ARTICLE_TITLE
+        requests_.append(
+            {
+                "endpoint": endpoints["create_article"],
+                "payload": build_article_payload(md_content, title),
+            }
+        )
+        topic_payload = build_topic_payload(
+            summary,
+            title=title,
+            tags=tags,
+            article_id=ARTICLE_ID_PLACEHOLDER,
+        )
+    else:
+        title = source.title
+        topic_payload = build_topic_payload(md_content, title=title, tags=tags)
+
+    for group_id in group_ids:
+        requests_.append(
+            {"endpoint": topic_endpoint(group_id, api_base), "payload": topic_payload}
+        )
+
+    rendered = {
+        "source": str(source.path),
+        "mode": mode,
+        "title": title,
+        "profile": account["name"],
+        "tags": tags or [],
+        "hashtags": format_hashtags(tags) if tags else "",
+        "groups": group_ids,
+        "requests": requests_,
+    }
+    if meta.get("schedule"):
+        rendered["schedule"] = meta["schedule"].isoformat()
+    return rendered
+
+
+def _output_paths(paths: List[str], out_dir: Path) -> List[Tuple[Path, Path]]:
+    """每个输入文件的输出路径: 保持相对所有输入的共同上级目录的结构，后缀改为 .json
+
+    Raises:
+        ValueError: 两个文件的输出路径相同（如 a.md 与 a.markdown）
+    """
+    inputs = [Path(raw).resolve() for raw in paths]
+    root = Path(
+        os.path.commonpath([str(p if p.is_dir() else p.parent) for p in inputs])
+    )
+    outputs: Dict[Path, Path] = {}
+    for path in collect_markdown_files(paths):
+        out_path = (out_dir / path.relative_to(root)).with_suffix(".json")
+        if out_path in outputs:
+            raise ValueError(
+                f"输出文件冲突: {outputs[out_path]} 和 {path} 都会写入 {out_path}"
+            )
+        outputs[out_path] = path
+    return [(path, out_path) for out_path, path in outputs.items()]
+
+
+def _render_worker(
+    job: Tuple[str, str, str, Optional[List[str]], Optional[str]]
+) -> Dict[str, Any]:
+    """进程池任务: 渲染并直接写出结果，只把摘要传回主进程"""
+    path, out_path, mode, tags, profile = job
+    try:
+        rendered = render_file(path, mode=mode, tags=tags, profile=profile)
+    except Exception as e:
+        return {"source": path, "error": str(e)}
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(rendered, f, ensure_ascii=False, indent=2)
+    return {"source": path, "output": out_path, "mode": rendered["mode"]}
+
+
+def render_paths(
+    paths: List[str],
+    out_dir: str,
+    mode: str = "auto",
+    tags: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+    profile: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """批量渲染文件/目录到输出目录
+
+    Args:
+        paths: Markdown 文件或目录
+        out_dir: 输出目录
+        mode: 发布模式
+        tags: 附加标签
+        jobs: 并行进程数（默认 CPU 核数，1 表示串行）
+        profile: 未在 front matter 中声明账号的文件使用的账号
+    Returns:
+        每个文件的渲染摘要（source/output/mode 或 source/error）
+    Raises:
+        FileNotFoundError: 输入不存在
+        ValueError: 两个文件的输出路径相同
+    """
+    job_list = [
+        (str(path), str(out_path), mode, tags, profile)
+        for path, out_path in _output_paths(paths, Path(out_dir).resolve())
+    ]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(job_list) <= 1:
+        return [_render_worker(job) for job in job_list]
+
+    chunksize = max(1, len(job_list) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_render_worker, job_list, chunksize=chunksize))
@@ -4,12 +4,19 @@
 
 自动管理虚拟环境和依赖安装，确保脚本在隔离环境中运行。
 用法: python run.py <script_name> [args...]
+      python run.py --build-wheelhouse [目录]   预先下载依赖到本地 wheelhouse
+
+依赖是否需要重新安装按 requirements.txt 的内容哈希判断（touch 或重新
+checkout 不会触发安装）。存在 wheelhouse 目录（默认 <技能目录>/wheelhouse，
+可用环境变量 ZSXQ_WHEELHOUSE 指定）时离线安装，不访问网络。
 """
 
+import hashlib
 import subprocess
 import sys
 import os
 from pathlib import Path
+from typing import List, Optional
 
 # Windows UTF-8 console support
 if sys.platform == "win32":
@@ -19,6 +26,10 @@ SKILL_DIR = Path(__file__).parent.parent
 SCRIPTS_DIR = SKILL_DIR / "scripts"
 VENV_DIR = SKILL_DIR / ".venv"
 REQUIREMENTS_FILE = SKILL_DIR / "requirements.txt"
+DEPS_MARKER = VENV_DIR / ".deps_installed"
+WHEELHOUSE_DIR = Path(os.environ.get("ZSXQ_WHEELHOUSE", SKILL_DIR / "wheelhouse"))
+# pip 22.3 起支持 --python，可用外部 pip 给不带 pip 的虚拟环境安装依赖
+PIP_PYTHON_OPTION_VERSION = (22, 3)
 
 
 def get_python_path() -> str:
@@ -35,6 +46,44 @@ def get_pip_path() -> str:
     return str(VENV_DIR / "bin" / "pip")
 
 
+def requirements_hash() -> str:
+    """requirements.txt 的内容哈希（文件不存在时为空字符串）"""
+    if not REQUIREMENTS_FILE.exists():
+        return ""
+    return hashlib.sha256(REQUIREMENTS_FILE.read_bytes()).hexdigest()
+
+
+def find_wheelhouse() -> Optional[Path]:
+    """本地 wheelhouse 目录（存在且包含 wheel 文件时返回）"""
+    if WHEELHOUSE_DIR.is_dir() and any(WHEELHOUSE_DIR.glob("*.whl")):
+        return WHEELHOUSE_DIR
+    return None
+
+
+def _host_pip_supports_python_option() -> bool:
+    try:
+        import pip
+    except ImportError:
+        return False
+    version = tuple(int(part) for part in pip.__version__.split(".")[:2] if part.isdigit())
+    return version >= PIP_PYTHON_OPTION_VERSION
+
+
+def get_pip_command() -> List[str]:
+    """给虚拟环境安装依赖的 pip 命令
+
+    优先使用虚拟环境自带的 pip；新建的虚拟环境不带 pip（省去 ensurepip
+    的几秒钟），用当前解释器的 pip 加 --python 安装，pip 版本过旧时
+    才在虚拟环境中安装 pip。
+    """
+    if Path(get_pip_path()).exists():
+        return [get_pip_path()]
+    if _host_pip_supports_python_option():
+        return [sys.executable, "-m", "pip", "--python", get_python_path()]
+    subprocess.run([get_python_path(), "-m", "ensurepip", "-q"], check=True)
+    return [get_pip_path()]
+
+
 def ensure_venv():
     """确保虚拟环境存在且依赖已安装"""
     python_path = get_python_path()
@@ -42,22 +91,45 @@ def ensure_venv():
     if not Path(python_path).exists():
         print("[setup] 创建虚拟环境...")
         subprocess.run(
-            [sys.executable, "-m", "venv", str(VENV_DIR)],
+            [sys.executable, "-m", "venv", "--without-pip", str(VENV_DIR)],
             check=True,
         )
 
-    # 检查是否需要安装依赖
-    marker = VENV_DIR / ".deps_installed"
-    req_mtime = REQUIREMENTS_FILE.stat().st_mtime if REQUIREMENTS_FILE.exists() else 0
-    marker_mtime = marker.stat().st_mtime if marker.exists() else 0
-
-    if req_mtime > marker_mtime:
+    # 依赖按 requirements.txt 的内容哈希判断是否需要安装
+    req_hash = requirements_hash()
+    installed = DEPS_MARKER.read_text().strip() if DEPS_MARKER.exists() else ""
+    if not req_hash or req_hash == installed:
+        return
+
+    # 不预编译字节码（首次导入时再编译），不检查 pip 新版本（离线时会等待超时）
+    command = get_pip_command() + [
+        "install", "-q", "--no-compile", "--disable-pip-version-check",
+        "-r", str(REQUIREMENTS_FILE),
+    ]
+    wheelhouse = find_wheelhouse()
+    if wheelhouse:
+        print(f"[setup] 从本地 wheelhouse 安装依赖: {wheelhouse}")
+        command += ["--no-index", "--find-links", str(wheelhouse)]
+    else:
         print("[setup] 安装依赖...")
-        subprocess.run(
-            [get_pip_path(), "install", "-q", "-r", str(REQUIREMENTS_FILE)],
-            check=True,
-        )
-        marker.touch()
+    subprocess.run(command, check=True)
+    DEPS_MARKER.write_text(req_hash + "\n")
+
+
+def build_wheelhouse(target: Path) -> None:
+    """下载并构建 requirements.txt 中所有依赖的 wheel，供离线安装
+
+    wheel 与平台和 Python 版本相关，需要在与运行环境相同的系统上构建。
+    """
+    print(f"[setup] 构建 wheelhouse: {target}")
+    target.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [sys.executable, "-m", "pip", "wheel", "-q",
+         "-r", str(REQUIREMENTS_FILE), "-w", str(target)],
+        check=True,
+    )
+    count = len(list(target.glob("*.whl")))
+    print(f"[OK] 已生成 {count} 个 wheel，运行时设置 ZSXQ_WHEELHOUSE={target} 即可离线安装")
 
 
 def main():
@@ -66,6 +138,11 @@ def main():
         print("示例: python run.py main.py publish --file test.md")
         sys.exit(1)
 
+    if sys.argv[1] == "--build-wheelhouse":
+        target = Path(sys.argv[2]) if len(sys.argv) > 2 else WHEELHOUSE_DIR
+        build_wheelhouse(target.resolve())
+        return
+
     script_name = sys.argv[1]
     script_path = SCRIPTS_DIR / script_name
 
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 状态文件存储模块
+
+发布历史、用户配置、auth.json 等状态文件的并发安全读写:
+1. 文件锁: 同目录下的 <文件名>.lock（POSIX 用 fcntl，Windows 用 msvcrt）
+2. 原子写入: 先写同目录临时文件并 fsync，再 os.replace 替换
+
+多个进程同时发布时，读-改-写在锁内完成，不会互相覆盖；
+写入中途崩溃也只会留下临时文件，原文件保持完整。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+LOCK_TIMEOUT_SECONDS = 30
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = LOCK_TIMEOUT_SECONDS) -> Iterator[None]:
+    """对 path 加排他锁（阻塞等待，超时抛出 TimeoutError）"""
+    lock_path = Path(str(path) + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _acquire(fd, lock_path, timeout)
+        try:
+            yield
+        finally:
+            _release(fd)
+    finally:
+        os.close(fd)
+
+
+def _acquire(fd: int, lock_path: Path, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待文件锁超时: {lock_path}")
+            time.sleep(0.05)
+
+
+def _release(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """原子写入 JSON 文件（临时文件 + fsync + os.replace）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent)
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, str(path))
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def quarantine_corrupt(path: Path) -> Path:
+    """把无法解析的文件改名保留（<文件名>.corrupt-<时间戳>），返回新路径"""
+    path = Path(path)
+    backup = path.with_name(f"{path.name}.corrupt-{int(time.time())}")
+    os.replace(str(path), str(backup))
+    return backup
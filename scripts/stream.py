@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 流式发布模块
+
+从标准输入逐行读取 JSON（JSONL），每行一篇帖子:
+
+    {"markdown": "# 标题\\n正文...", "title": "可选", "tags": ["标签"], "mode": "auto", "id": "可选"}
+
+text 与 markdown 等价（二选一），tags 也可以是逗号分隔的字符串，
+id 原样写回结果，便于调用方对应。每处理完一行向标准输出写一行 JSON 结果
+（按输入顺序），进度信息写到标准错误。
+
+读取、准备和发送逐行进行，最多 max_concurrency 篇在途，内存占用与输入总量无关，
+适合由程序通过管道持续输送大量帖子，不需要先写临时文件。
+"""
+
+import json
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+from batch import BATCH_INTERVAL_SECONDS, result_status
+from payloads import merge_tags
+from prepare import prepare_text
+from throttle import AdaptiveConcurrency
+
+STREAM_MODES = ("auto", "topic", "article")
+# 从发布历史记录复制到结果行的字段
+RESULT_RECORD_FIELDS = ("publish_type", "title", "topic_id", "article_id", "article_url")
+# 无法解析的行中的 "id" 字段（字符串或数字）
+_ID_RE = re.compile(r'"id"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?)')
+
+
+def parse_post(line: str, default_mode: str = "auto") -> Dict[str, Any]:
+    """解析一行输入
+
+    Raises:
+        ValueError: 不是 JSON 对象、缺少正文或字段类型错误
+    """
+    try:
+        post = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 格式错误: {e}")
+    if not isinstance(post, dict):
+        raise ValueError("每行必须是一个 JSON 对象")
+
+    text = post.get("markdown", post.get("text"))
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("缺少 text 或 markdown 字段")
+
+    mode = post.get("mode") or default_mode
+    if mode not in STREAM_MODES:
+        raise ValueError(f"mode 只能是 {'/'.join(STREAM_MODES)}: {mode}")
+
+    title = post.get("title") or ""
+    if not isinstance(title, str):
+        raise ValueError("title 必须是字符串")
+
+    tags = post.get("tags")
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",") if t.strip()]
+    elif tags is not None and not (
+        isinstance(tags, list) and all(isinstance(t, str) for t in tags)
+    ):
+        raise ValueError("tags 必须是字符串列表或逗号分隔的字符串")
+
+    return {"id": post.get("id"), "text": text, "title": title, "mode": mode, "tags": tags}
+
+
+def _extract_id(line: str) -> Any:
+    """尽量从无效的输入行中取出 id（JSON 不完整时按文本查找），取不到返回 None"""
+    try:
+        post = json.loads(line)
+    except json.JSONDecodeError:
+        match = _ID_RE.search(line)
+        if match is None:
+            return None
+        try:
+            return json.loads(match.group(1))
+        except json.JSONDecodeError:
+            return None
+    return post.get("id") if isinstance(post, dict) else None
+
+
+def publish_post(
+    pub: Any, post: Dict[str, Any], source: str, tags: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """准备并发布一篇帖子（可在发送线程中调用），返回结果行的字段
+
+    status 与批量发布相同（published/skipped/invalid/failed/topic_failed/circuit_open），
+    知识星球返回的审核状态在 process_status 中。
+    """
+    pub.last_record = None
+    prepared = prepare_text(
+        post["text"],
+        title=post["title"],
+        mode=post["mode"],
+        tags=merge_tags(tags, post["tags"]),
+        path=source,
+    )
+    raw = pub.publish_prepared(prepared)
+    record = pub.last_record or {}
+
+    result: Dict[str, Any] = {
+        "succeeded": bool(raw.get("succeeded")),
+        "status": result_status(raw),
+    }
+    for key in RESULT_RECORD_FIELDS:
+        if record.get(key) is not None:
+            result[key] = record[key]
+    if record.get("status"):
+        result["process_status"] = record["status"]
+    for key in ("violations", "near_duplicate"):
+        if raw.get(key):
+            result[key] = raw[key]
+    return result
+
+
+def _result_line(line_no: int, post_id: Any, outcome: Any) -> Dict[str, Any]:
+    """结果行: 行号、id（输入中有时）和 publish_post 的结果或 error"""
+    line: Dict[str, Any] = {"line": line_no}
+    if post_id is not None:
+        line["id"] = post_id
+    if isinstance(outcome, Exception):
+        line.update(succeeded=False, status="failed", error=str(outcome))
+    else:
+        line.update(outcome)
+    return line
+
+
+def publish_stream(
+    pub: Any,
+    lines: Iterable[str],
+    out: TextIO,
+    log: Optional[TextIO] = None,
+    mode: str = "auto",
+    tags: Optional[List[str]] = None,
+    interval: float = BATCH_INTERVAL_SECONDS,
+    max_concurrency: int = 1,
+) -> Dict[str, int]:
+    """逐行发布 JSONL 输入，每行输出一行 JSON 结果，返回各状态的数量
+
+    Args:
+        pub: ZsxqPublisher 实例
+        lines: 输入行（如 sys.stdin），空行忽略
+        out: 结果输出（每行写完立即 flush）
+        log: 错误信息输出（默认不输出；发布器的进度信息由 pub.log_file 决定）
+        mode: 输入行未声明 mode 时使用的发布模式
+        tags: 附加到每篇帖子的标签
+        interval: 顺序发送时两次发送之间的间隔（秒）
+        max_concurrency: 最多同时发送的帖子数，大于 1 时由 AIMD 控制器调节
+    """
+    concurrent = max_concurrency > 1
+    if concurrent and pub.concurrency is None:
+        pub.concurrency = AdaptiveConcurrency(max_concurrency)
+
+    counts: Dict[str, int] = {}
+    # 已开始处理的帖子，按输入顺序输出: (行号, id, 结果/异常/发送任务)
+    pending: deque = deque()
+    last_sent = False
+
+    def emit(line_no: int, post_id: Any, outcome: Any) -> None:
+        if isinstance(outcome, Future):
+            try:
+                outcome = outcome.result()
+            except Exception as e:
+                outcome = e
+        line = _result_line(line_no, post_id, outcome)
+        if "error" in line and log is not None:
+            print(f"  [ERROR] 第 {line_no} 行: {line['error']}", file=log)
+        counts[line["status"]] = counts.get(line["status"], 0) + 1
+        out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        out.flush()
+
+    sender = ThreadPoolExecutor(max_workers=max_concurrency) if concurrent else None
+    with sender or nullcontext():
+        for line_no, raw in enumerate(lines, 1):
+            if not raw.strip():
+                continue
+            try:
+                post = parse_post(raw, default_mode=mode)
+            except ValueError as e:
+                invalid = {"succeeded": False, "status": "invalid", "error": str(e)}
+                pending.append((line_no, _extract_id(raw), invalid))
+            else:
+                source = f"stdin:{line_no}"
+                if sender is not None:
+                    outcome = sender.submit(publish_post, pub, post, source, tags)
+                else:
+                    # 上一篇实际发出了请求才需要间隔，避免请求过快
+                    if last_sent:
+                        time.sleep(interval * random.uniform(0.8, 1.2))
+                    try:
+                        outcome = publish_post(pub, post, source, tags)
+                    except Exception as e:
+                        outcome = e
+                    last_sent = isinstance(outcome, dict) and outcome["status"] in (
+                        "published",
+                        "failed",
+                        "topic_failed",
+                    )
+                pending.append((line_no, post["id"], outcome))
+
+            # 在途帖子数超过上限时按顺序等待最早的一篇，输入不会在内存中堆积
+            while pending and (not concurrent or len(pending) > max_concurrency):
+                emit(*pending.popleft())
+
+        while pending:
+            emit(*pending.popleft())
+    return counts
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 本地模拟服务
+
+在本机模拟发布用到的知识星球接口，用于离线联调和验证请求数量:
+
+  POST /v2/articles                   创建文章
+  PUT  /v2/articles/{article_id}      编辑文章
+  POST /v2/groups/{group_id}/topics   创建话题
+  GET  /v2/settings                   认证检查
+
+用法:
+  python stub_server.py --port 8765
+  然后在 data/user_config.json 中设置 "api_base": "http://127.0.0.1:8765/v2"
+
+每个请求打印一行日志（--quiet 时不打印），Ctrl+C 停止时打印按接口统计的请求数。
+--latency 模拟接口耗时，--capacity 限制同时处理的请求数（超出时返回 429），
+用于观察批量并发发送的自适应调整。
+请求体可以 gzip 压缩（Content-Encoding: gzip），--reject-gzip 时返回 415
+（验证发布器回退为不压缩）；--bandwidth 按上行带宽模拟请求体的传输耗时，
+用于比较压缩前后的发送耗时（bench_transport.py）。
+文章和话题只保存在内存中，不校验 Cookie。
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+_ARTICLE_RE = re.compile(r"^/v2/articles/([^/]+)$")
+_TOPIC_RE = re.compile(r"^/v2/groups/(\d+)/topics$")
+
+
+class StubState:
+    """模拟服务的内存数据（多线程共享）"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        capacity: int = 0,
+        bandwidth: float = 0.0,
+        reject_gzip: bool = False,
+        quiet: bool = False,
+    ):
+        self.latency = latency
+        self.capacity = capacity
+        self.bandwidth = bandwidth
+        self.reject_gzip = reject_gzip
+        self.quiet = quiet
+        self.in_flight = 0
+        # 收到的请求体字节数（压缩时为压缩后的大小）
+        self.bytes_received = 0
+        self.articles: Dict[str, Dict[str, Any]] = {}
+        self.topics: Dict[int, Dict[str, Any]] = {}
+        self.requests: Counter = Counter()
+        # 模拟的上行链路由所有连接共用，请求体依次传输
+        self.link = threading.Lock()
+        self._ids = itertools.count(int(time.time()) * 1000)
+        self.lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self.lock:
+            return next(self._ids)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.state.quiet:
+            print("  " + format % args, file=sys.stderr)
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        """读取 JSON 请求体（支持 gzip），不接受压缩时回复 415 并返回 None"""
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        state = self.state
+        with state.lock:
+            state.bytes_received += len(raw)
+        if state.bandwidth:
+            # 按上行带宽（字节/秒）模拟请求体的传输耗时
+            with state.link:
+                time.sleep(len(raw) / state.bandwidth)
+
+        if self.headers.get("Content-Encoding") == "gzip":
+            if state.reject_gzip:
+                with state.lock:
+                    state.requests[f"{self.command} {self.path} (415)"] += 1
+                self._reply(415, {"succeeded": False, "error": "unsupported encoding"})
+                return None
+            raw = gzip.decompress(raw)
+        try:
+            return json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self._reply(400, {"succeeded": False, "error": "invalid json"})
+            return None
+
+    def _reply(self, status: int, data: Dict[str, Any]) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _begin(self, route: str) -> bool:
+        """统计请求并模拟耗时，超出 capacity 时回复 429 并返回 False"""
+        state = self.state
+        with state.lock:
+            state.requests[f"{self.command} {route}"] += 1
+            overloaded = bool(state.capacity) and state.in_flight >= state.capacity
+            if not overloaded:
+                state.in_flight += 1
+        if overloaded:
+            state.requests[f"{self.command} {route} (429)"] += 1
+            self._reply(429, {"succeeded": False, "error": "too many requests"})
+            return False
+        if state.latency:
+            time.sleep(state.latency)
+        with state.lock:
+            state.in_flight -= 1
+        return True
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] == "/v2/settings":
+            if self._begin("/v2/settings"):
+                self._reply(200, {"succeeded": True, "resp_data": {}})
+        else:
+            self._reply(404, {"succeeded": False, "error": "not found"})
+
+    def do_POST(self) -> None:
+        payload = self._read_json()
+        if payload is None:
+            return
+        req_data = payload.get("req_data", {})
+
+        if self.path == "/v2/articles":
+            if not self._begin("/v2/articles"):
+                return
+            article_id = str(self.state.next_id())
+            self.state.articles[article_id] = req_data
+            self._reply(200, {
+                "succeeded": True,
+                "resp_data": {
+                    "article_id": article_id,
+                    "article_url": f"https://articles.zsxq.com/id_{article_id}.html",
+                },
+            })
+            return
+
+        match = _TOPIC_RE.match(self.path)
+        if match:
+            if not self._begin("/v2/groups/{group_id}/topics"):
+                return
+            topic_id = self.state.next_id()
+            self.state.topics[topic_id] = dict(req_data, group_id=match.group(1))
+            self._reply(200, {
+                "succeeded": True,
+                "resp_data": {
+                    "topic": {"topic_id": topic_id, "process_status": "in_review"}
+                },
+            })
+            return
+
+        self._reply(404, {"succeeded": False, "error": "not found"})
+
+    def do_PUT(self) -> None:
+        payload = self._read_json()
+        if payload is None:
+            return
+        match = _ARTICLE_RE.match(self.path)
+        if not match:
+            self._reply(404, {"succeeded": False, "error": "not found"})
+            return
+
+        if not self._begin("/v2/articles/{article_id}"):
+            return
+        article_id = match.group(1)
+        if article_id not in self.state.articles:
+            self._reply(404, {"succeeded": False, "error": "article not found"})
+            return
+        self.state.articles[article_id] = payload.get("req_data", {})
+        self._reply(200, {"succeeded": True, "resp_data": {"article_id": article_id}})
+
+
+def start_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency: float = 0.0,
+    capacity: int = 0,
+    bandwidth: float = 0.0,
+    reject_gzip: bool = False,
+    quiet: bool = False,
+) -> ThreadingHTTPServer:
+    """在后台线程启动模拟服务（port 为 0 时随机端口），返回服务对象
+
+    quiet 为 True 时不打印每个请求的日志。
+    """
+    state = StubState(latency, capacity, bandwidth, reject_gzip, quiet)
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="知识星球接口本地模拟服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口（默认8765）")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="每个请求的模拟耗时（秒）"
+    )
+    parser.add_argument(
+        "--capacity", type=int, default=0, help="同时处理的请求数上限（0 为不限）"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=0.0,
+        help="模拟上行带宽（KB/s，0 为不限），请求体越大传输越慢",
+    )
+    parser.add_argument(
+        "--reject-gzip", action="store_true", help="拒绝 gzip 压缩的请求体（返回 415）"
+    )
+    parser.add_argument("--quiet", action="store_true", help="不打印每个请求的日志")
+    args = parser.parse_args()
+
+    server = start_server(
+        args.host,
+        args.port,
+        args.latency,
+        args.capacity,
+        bandwidth=args.bandwidth * 1024,
+        reject_gzip=args.reject_gzip,
+        quiet=args.quiet,
+    )
+    host, port = server.server_address[:2]
+    print(f"模拟服务已启动: http://{host}:{port}/v2（Ctrl+C 停止）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+    state = server.RequestHandlerClass.state
+    print("\n请求统计:")
+    for route, count in sorted(state.requests.items()):
+        print(f"  {route}: {count}")
+    print(f"  请求体共 {state.bytes_received / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
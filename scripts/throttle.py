@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 限流模块
+
+每个账号一个令牌桶: 按每分钟请求数匀速补充令牌，最多积攒 burst 个，
+发送请求前取一个令牌，没有令牌时等待。多个账号各自限流，互不影响。
+
+批量并发发送时，AdaptiveConcurrency 按请求耗时和失败信号（AIMD）
+自动调整同时在途的请求数。
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class RateLimiter:
+    """令牌桶限流器（线程安全）"""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        """
+        Args:
+            per_minute: 每分钟允许的请求数
+            burst: 空闲后允许连续发送的请求数
+        """
+        if per_minute <= 0:
+            raise ValueError(f"rate_limit 必须大于 0: {per_minute}")
+        self.per_minute = per_minute
+        self.burst = max(1, burst)
+        self._interval = 60.0 / per_minute
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed / self._interval)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """取一个令牌，必要时等待，返回等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 先预扣令牌再在锁外等待，并发调用按顺序排队
+            self._tokens -= 1
+            wait = -self._tokens * self._interval if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency:
+    """AIMD 自适应并发上限（线程安全）
+
+    每个请求发送前占用一个名额，名额数即同时在途的请求数上限:
+    - 请求成功且耗时没有明显超过基线: 上限加性增长（每完成约 limit 个请求 +1）
+    - 超时、连接失败、429、5xx 或接口限流错误码: 上限乘性减小
+    同一批在途请求的失败只退避一次（退避之前发出的请求不再重复减小上限）。
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        initial: float = 1,
+        minimum: float = 1,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ):
+        """
+        Args:
+            maximum: 并发上限的最大值
+            initial: 初始上限
+            minimum: 退避后的最小上限
+            backoff: 退避时上限乘以的系数
+            latency_tolerance: 耗时超过基线的该倍数时不再增长
+        """
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.peak = self.limit
+        self.backoffs = 0
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._last_backoff = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """等待空闲名额，返回请求开始时间（传给 release）"""
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, congested: bool = False) -> None:
+        """归还名额并按本次请求的耗时和结果调整上限"""
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self._in_flight -= 1
+            if congested:
+                if started >= self._last_backoff:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._last_backoff = now
+                    self.backoffs += 1
+            else:
+                # 基线取耗时的慢速移动最小值: 耗时变短立即跟随，变长缓慢跟随
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                else:
+                    self._baseline += (latency - self._baseline) * 0.05
+                if latency <= self._baseline * self.latency_tolerance:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                    self.peak = max(self.peak, self.limit)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前状态（写入批量发布的 metrics）"""
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "peak": int(self.peak),
+                "maximum": self.maximum,
+                "backoffs": self.backoffs,
+            }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - HTTP 传输调优
+
+- 按接口区分的超时: 每个接口单独设置 (连接超时, 读取超时)，
+  连接阶段很快失败，文章这类大请求体的读取超时更长
+- 请求体 gzip 压缩: 开启后超过 COMPRESS_MIN_BYTES 的请求体压缩后发送
+  （Content-Encoding: gzip），文章 HTML 通常可压缩到几分之一；
+  服务器以 415（或说明编码问题的 400）拒绝时该接口改为不压缩重发，之后不再压缩
+- HTTP/2: 安装了 httpx[http2] 时可用 HttpxSession 代替 requests.Session，
+  并发发送时多个请求复用同一个连接（HTTPS 通过 ALPN 协商，服务器不支持时使用 HTTP/1.1）
+"""
+
+import gzip
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+# 请求体小于此字节数时不压缩（压缩收益小于开销）
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = 6
+# 服务器不接受压缩请求体时的响应: 415，或响应内容提到编码的 400
+# （其他 400 是请求本身的错误，不压缩重发也不会成功，且 POST 重发可能重复创建）
+COMPRESSION_REJECTED_STATUS = 415
+_COMPRESSION_ERROR_RE = re.compile(r"content-encoding|gzip", re.IGNORECASE)
+
+_ENDPOINT_PATTERNS = (
+    ("POST", re.compile(r"/articles$"), "create_article"),
+    ("PUT", re.compile(r"/articles/[^/]+$"), "update_article"),
+    ("POST", re.compile(r"/topics$"), "create_topic"),
+    ("GET", re.compile(r"/settings$"), "settings"),
+)
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """请求对应的接口名称（超时配置和压缩协商按接口区分），未知接口为 default"""
+    path = urlsplit(url).path.rstrip("/")
+    for pattern_method, pattern, name in _ENDPOINT_PATTERNS:
+        if method == pattern_method and pattern.search(path):
+            return name
+    return "default"
+
+
+def resolve_timeouts(
+    defaults: Dict[str, Tuple[float, float]], overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Tuple[float, float]]:
+    """合并超时配置，覆盖值可以是 [连接, 读取] 或单个数字（两者相同）
+
+    Raises:
+        ValueError: 超时格式错误或不大于 0
+    """
+    timeouts = dict(defaults)
+    for name, value in (overrides or {}).items():
+        if isinstance(value, (int, float)):
+            value = (value, value)
+        try:
+            connect, read = (float(v) for v in value)
+        except (TypeError, ValueError):
+            raise ValueError(f"超时配置格式错误（应为 [连接, 读取] 秒数）: {name}={value}")
+        if connect <= 0 or read <= 0:
+            raise ValueError(f"超时必须大于 0: {name}={value}")
+        timeouts[name] = (connect, read)
+    return timeouts
+
+
+def gzip_json(payload: Any, headers: Dict[str, str]) -> Optional[bytes]:
+    """把请求体编码为 gzip 压缩的 JSON 并设置请求头，太小不值得压缩时返回 None"""
+    body = json.dumps(payload, allow_nan=False).encode("utf-8")
+    if len(body) < COMPRESS_MIN_BYTES:
+        return None
+    headers["content-type"] = "application/json"
+    headers["content-encoding"] = "gzip"
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+
+
+def compression_rejected(status_code: int, text: str) -> bool:
+    """响应是否表示服务器不接受压缩的请求体（可以不压缩重发）"""
+    if status_code == COMPRESSION_REJECTED_STATUS:
+        return True
+    return status_code == 400 and bool(_COMPRESSION_ERROR_RE.search(text or ""))
+
+
+def decode_json_body(data: Optional[bytes], headers: Optional[Dict[str, str]]) -> Any:
+    """还原 gzip_json 编码的请求体（录制 cassette 时使用）"""
+    if data is None:
+        return None
+    encoding = {k.lower(): v for k, v in (headers or {}).items()}.get("content-encoding")
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+class HttpxSession:
+    """基于 httpx 的 HTTP 会话（支持 HTTP/2），接口与 publisher 使用的 requests.Session 相同
+
+    超时和连接失败转换为 requests 的异常，发布器的熔断与并发控制逻辑不变。
+    """
+
+    def __init__(self, http2: bool = True):
+        """
+        Raises:
+            ImportError: 未安装 httpx（HTTP/2 还需要 h2）
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("HTTP/2 需要安装 httpx[http2]（pip install 'httpx[http2]'）")
+        self._httpx = httpx
+        # http2=True 时缺少 h2 会抛出 ImportError
+        self._client = httpx.Client(http2=http2)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        data: Optional[bytes] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+    ) -> Any:
+        httpx = self._httpx
+        headers = dict(headers or {})
+        if cookies:
+            headers["cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+        options: Dict[str, Any] = {"headers": headers, "json": json, "content": data}
+        if timeout is not None:
+            connect, read = timeout
+            options["timeout"] = httpx.Timeout(read, connect=connect)
+        try:
+            return self._client.request(method, url, **options)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def post(self, url: str, **kwargs: Any) -> Any:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        return self.request("GET", url, **kwargs)
+
+    def close(self) -> None:
+        self._client.close()
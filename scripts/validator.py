@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 发布前校验模块
+
+在发送任何请求之前，对即将发送的请求体做本地校验:
+- 话题文本长度（含标题和标签格式化后的最终文本）
+- 话题图片数量
+- 文章标题为空
+- 文章 HTML 大小
+- 指向本地文件的失效链接/图片
+
+校验失败的内容不会发出请求，避免文章已创建但话题发布失败留下孤立文章。
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from config import (
+    ARTICLE_MAX_HTML_LENGTH,
+    TOPIC_MAX_IMAGE_COUNT,
+    TOPIC_MAX_TEXT_LENGTH,
+)
+from planner import collect_markdown_files
+
+# 代码、Markdown 链接/图片、HTML 图片一次扫描: 代码先匹配并被忽略，
+# 不需要先复制一份去掉代码块的正文
+_SCAN_RE = re.compile(
+    r"(?P<code>```[\s\S]*?```|`[^`\n]+`)"
+    r"|(?P<bang>!?)\[[^\]]*\]\(\s*<?(?P<target>[^)\s>]+)>?(?:\s+[\"'][^)]*[\"'])?\s*\)"
+    r"|<img\b[^>]*?\bsrc=[\"'](?P<src>[^\"']+)[\"']",
+    re.IGNORECASE,
+)
+_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+def check_topic_payload(payload: Dict[str, Any]) -> List[str]:
+    """校验话题请求体"""
+    text = payload.get("req_data", {}).get("text", "")
+    if len(text) > TOPIC_MAX_TEXT_LENGTH:
+        return [f"话题文本长度 {len(text)} 超过上限 {TOPIC_MAX_TEXT_LENGTH}"]
+    return []
+
+
+def check_article_payload(payload: Dict[str, Any]) -> List[str]:
+    """校验创建文章请求体"""
+    violations = []
+    req_data = payload.get("req_data", {})
+    title = str(req_data.get("title", "")).strip()
+    if not title:
+        violations.append("文章标题为空")
+    html_length = len(req_data.get("content", ""))
+    if html_length > ARTICLE_MAX_HTML_LENGTH:
+        violations.append(
+            f"文章 HTML 长度 {html_length} 超过上限 {ARTICLE_MAX_HTML_LENGTH}"
+        )
+    return violations
+
+
+def check_markdown(
+    md_content: str, mode: str, base_dir: Optional[Path] = None
+) -> List[str]:
+    """校验 Markdown 正文: 话题图片数量、本地链接是否存在
+
+    Args:
+        md_content: Markdown 正文
+        mode: 发布模式（topic / article）
+        base_dir: 相对链接的基准目录（为空时不检查本地链接）
+    """
+    violations = []
+    links = []
+    for m in _SCAN_RE.finditer(md_content):
+        if m.group("target"):
+            links.append((bool(m.group("bang")), m.group("target")))
+        elif m.group("src"):
+            links.append((True, m.group("src")))
+
+    if mode == "topic":
+        image_count = sum(1 for is_image, _ in links if is_image)
+        if image_count > TOPIC_MAX_IMAGE_COUNT:
+            violations.append(
+                f"话题图片数量 {image_count} 超过上限 {TOPIC_MAX_IMAGE_COUNT}"
+            )
+
+    if base_dir is not None:
+        for is_image, target in links:
+            local = _local_target(target, base_dir)
+            if local is not None and not local.exists():
+                kind = "图片" if is_image else "链接"
+                violations.append(f"本地{kind}不存在: {target}")
+
+    return violations
+
+
+def _local_target(target: str, base_dir: Path) -> Optional[Path]:
+    """解析指向本地文件的链接，外部链接和页内锚点返回 None"""
+    if target.startswith(("#", "//")) or _SCHEME_RE.match(target):
+        return None
+    target = unquote(target.split("#", 1)[0].split("?", 1)[0])
+    if not target:
+        return None
+    path = Path(target)
+    return path if path.is_absolute() else base_dir / path
+
+
+def check_rendered(rendered: Dict[str, Any], md_content: str) -> List[str]:
+    """校验渲染结果（render_file 的返回值）中的全部请求"""
+    violations = check_markdown(
+        md_content, rendered["mode"], Path(rendered["source"]).parent
+    )
+    for request in rendered["requests"]:
+        if "/articles" in request["endpoint"]:
+            violations += check_article_payload(request["payload"])
+        else:
+            violations += check_topic_payload(request["payload"])
+    # 多个星球的话题请求体相同，去掉重复提示
+    return list(dict.fromkeys(violations))
+
+
+def validate_file(
+    file_path: str, mode: str = "auto", tags: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """校验单个文件，返回 {"source": 路径, "violations": [...]}"""
+    from frontmatter import MarkdownSource
+    from render import render_file
+
+    try:
+        rendered = render_file(file_path, mode=mode, tags=tags)
+        md_content = MarkdownSource(file_path).read_body()
+    except Exception as e:
+        return {"source": file_path, "violations": [f"无法解析: {e}"]}
+    return {
+        "source": file_path,
+        "mode": rendered["mode"],
+        "violations": check_rendered(rendered, md_content),
+    }
+
+
+def _validate_worker(
+    job: Tuple[str, str, Optional[List[str]]]
+) -> Dict[str, Any]:
+    path, mode, tags = job
+    return validate_file(path, mode=mode, tags=tags)
+
+
+def validate_paths(
+    paths: List[str],
+    mode: str = "auto",
+    tags: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """批量校验文件/目录，一次性返回所有文件的校验结果"""
+    job_list = [(str(p), mode, tags) for p in collect_markdown_files(paths)]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(job_list) <= 1:
+        return [_validate_worker(job) for job in job_list]
+
+    chunksize = max(1, len(job_list) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_validate_worker, job_list, chunksize=chunksize))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 目录监听模块
+
+监听目录中新增或修改的 Markdown 文件并交给回调处理:
+1. Linux 下使用 inotify（通过 ctypes 调用 libc，无需额外依赖）
+2. 其他平台或 inotify 不可用时回退为定时扫描 mtime/size
+
+连续保存会被去抖，短时间内的一批变更会合并为一次回调。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 3.0
+
+# inotify 常量（见 <sys/inotify.h>）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY | _IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_markdown_file(path: Path) -> bool:
+    """判断是否为需要处理的 Markdown 文件（忽略隐藏文件和编辑器临时文件）"""
+    name = path.name
+    if name.startswith(".") or name.endswith("~"):
+        return False
+    return path.suffix.lower() in MARKDOWN_SUFFIXES
+
+
+def iter_markdown_files(directory: Path) -> Iterable[Path]:
+    """递归遍历目录下的 Markdown 文件（跳过隐藏目录）"""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            path = Path(root) / name
+            if is_markdown_file(path):
+                yield path
+
+
+class _PollingSource:
+    """定时扫描目录，比较 mtime/size 得到变更文件"""
+
+    def __init__(self, directory: Path, interval: float = DEFAULT_POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[float, int]]:
+        snapshot = {}
+        for path in iter_markdown_files(self.directory):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime, st.st_size)
+        return snapshot
+
+    def read(self, timeout: float) -> Set[Path]:
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        changed = {p for p, sig in current.items() if self._snapshot.get(p) != sig}
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifySource:
+    """基于 inotify 的目录监听（递归添加子目录 watch）"""
+
+    def __init__(self, directory: Path):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self.directory = directory
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._watches: Dict[int, Path] = {}
+        self._add_tree(directory)
+
+    def _add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(str(path)), _WATCH_MASK
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch 失败: {path} ({os.strerror(err)})")
+        self._watches[wd] = path
+
+    def _add_tree(self, directory: Path) -> Set[Path]:
+        """为目录及其子目录添加 watch，返回其中已存在的 Markdown 文件"""
+        found = set()
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            self._add_watch(Path(root))
+            for name in files:
+                path = Path(root) / name
+                if is_markdown_file(path):
+                    found.add(path)
+        return found
+
+    def read(self, timeout: float) -> Set[Path]:
+        changed: Set[Path] = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & _IN_Q_OVERFLOW:
+                # 事件队列溢出，退化为全量扫描（由上层哈希去重兜底）
+                changed.update(iter_markdown_files(self.directory))
+                continue
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            parent = self._watches.get(wd)
+            if parent is None or not raw_name:
+                continue
+            path = parent / os.fsdecode(raw_name)
+
+            if mask & _IN_ISDIR:
+                created = mask & (_IN_CREATE | _IN_MOVED_TO)
+                if created and not path.name.startswith("."):
+                    # 新建或移入的子目录：补充 watch，并收录其中已有文件
+                    try:
+                        changed.update(self._add_tree(path))
+                    except OSError:
+                        pass
+                continue
+
+            if is_markdown_file(path):
+                changed.add(path)
+
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _open_source(directory: Path, force_polling: bool, poll_interval: float):
+    """优先使用 inotify，不可用时回退为轮询"""
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            source = _InotifySource(directory)
+            print(f"[watch] 使用 inotify 监听: {directory}")
+            return source
+        except (OSError, AttributeError) as e:
+            print(f"[watch] inotify 不可用（{e}），回退为轮询模式")
+    print(f"[watch] 使用轮询模式监听（间隔 {poll_interval} 秒）: {directory}")
+    return _PollingSource(directory, interval=poll_interval)
+
+
+def watch_directory(
+    directory: str,
+    on_batch: Callable[[List[Path]], None],
+    debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    force_polling: bool = False,
+    initial_scan: bool = False,
+    max_wait: Optional[float] = None,
+) -> None:
+    """监听目录并把稳定下来的 Markdown 文件批量交给 on_batch
+
+    去抖规则: 最后一次变更后静默 debounce 秒才提交本批；
+    若持续有写入，最长等待 max_wait 秒（默认 debounce 的 10 倍）后强制提交。
+
+    Args:
+        directory: 监听的目录
+        on_batch: 回调，参数为按路径排序的文件列表
+        debounce: 去抖时间（秒）
+        poll_interval: 轮询模式的扫描间隔（秒）
+        force_polling: 强制使用轮询模式
+        initial_scan: 启动时把目录中已有的文件作为第一批提交
+        max_wait: 一批变更的最长等待时间（秒）
+    """
+    root = Path(directory).resolve()
+    if not root.is_dir():
+        raise NotADirectoryError(f"目录不存在: {directory}")
+
+    if max_wait is None:
+        max_wait = debounce * 10
+
+    source = _open_source(root, force_polling, poll_interval)
+    pending: Dict[Path, float] = {}
+    first_seen = 0.0
+    last_event = 0.0
+
+    if initial_scan:
+        now = time.monotonic()
+        for path in iter_markdown_files(root):
+            pending[path] = now
+        first_seen = last_event = now
+
+    try:
+        while True:
+            changed = source.read(timeout=debounce / 2 if pending else 1.0)
+            now = time.monotonic()
+            if changed:
+                if not pending:
+                    first_seen = now
+                for path in changed:
+                    pending[path] = now
+                last_event = now
+
+            if not pending:
+                continue
+            quiet = now - last_event >= debounce
+            overdue = now - first_seen >= max_wait
+            if not (quiet or overdue):
+                continue
+
+            # 超时强制提交时，仍在写入中的文件留到下一批
+            ready = [p for p, t in pending.items() if now - t >= debounce]
+            for path in ready:
+                del pending[path]
+            first_seen = now
+
+            batch = sorted(p for p in ready if p.is_file())
+            if batch:
+                on_batch(batch)
+    finally:
+        source.close()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""知识星球发布工具 - 多机共享发布队列
+
+待发布文件写入共享存储上的 SQLite 队列（enqueue），多台机器各用自己的账号
+运行 work 领取文件发布:
+
+- 领取时在一个写事务中把文件标记为 leased，记录领取者和租约到期时间，
+  同一文件同一时间只会被一个发布器持有
+- 发布期间后台线程按租约时长的 1/3 续约（心跳）
+- 机器宕机或进程被杀时租约不再续期，到期后其他发布器可以重新领取
+- 发送前和记录结果时都确认租约仍由自己持有，租约被收回的文件不再发送
+- 文章已创建、引用话题未创建时记录文章信息，重新领取的发布器只创建引用话题
+
+队列文件所在的共享卷必须支持文件锁（SQLite 依赖文件锁保证事务互斥），
+各机器的时钟需大致同步（租约到期按本机时间判断）。
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from batch import publish_batch
+from checkpoint import LeaseLostError
+
+# 租约时长（秒），发布器在此时间内没有续约则视为失联
+LEASE_SECONDS = 300.0
+# 每次领取的文件数
+CLAIM_SIZE = 10
+# 请求失败的文件最多尝试次数，超过后标记为 failed 不再领取
+MAX_ATTEMPTS = 3
+# 等待写锁的时间（秒）
+SQLITE_TIMEOUT = 30.0
+# 结果为这些状态的文件视为完成
+DONE_STATUSES = ("published", "skipped", "invalid")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    article_result TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, lease_expires);
+"""
+
+
+def default_worker_id(profile: Optional[str] = None) -> str:
+    """发布器标识: 主机名:进程号[:账号]"""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    return f"{worker}:{profile}" if profile else worker
+
+
+class WorkQueue:
+    """SQLite 发布队列（每次操作使用独立连接，可在多线程、多进程、多机器间共享）
+
+    文件状态:
+    - pending: 等待领取
+    - leased: 已被领取，lease_expires 之前归 worker 所有
+    - done: 已完成（status 为 published/skipped/invalid）
+    - failed: 失败次数达到上限
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        if lease_seconds <= 0:
+            raise ValueError(f"租约时长必须大于 0: {lease_seconds}")
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(
+            str(self.path), timeout=SQLITE_TIMEOUT, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        with closing(conn):
+            yield conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务: 开始时即取得写锁，读取和更新之间不会被其他发布器插入"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def add(self, paths: List[Path]) -> int:
+        """加入待发布文件（已在队列中的忽略），返回新加入的数量"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (path, updated) VALUES (?, ?)",
+                [(str(path), now) for path in paths],
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker: str, limit: int = CLAIM_SIZE) -> List[Dict[str, Any]]:
+        """领取最多 limit 个文件（等待中的或租约已过期的），按加入顺序"""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, path, article_result FROM items"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)"
+                " ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE items SET state = 'leased', worker = ?, lease_expires = ?,"
+                " attempts = attempts + 1, updated = ? WHERE id = ?",
+                [(worker, now + self.lease_seconds, now, row["id"]) for row in rows],
+            )
+        return [
+            {
+                "id": row["id"],
+                "path": row["path"],
+                "article_result": json.loads(row["article_result"] or "null"),
+            }
+            for row in rows
+        ]
+
+    def renew(self, worker: str, ids: List[int]) -> int:
+        """续约仍由 worker 持有的文件，返回续约成功的数量"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE items SET lease_expires = ?, updated = ?"
+                " WHERE id = ? AND state = 'leased' AND worker = ?",
+                [(now + self.lease_seconds, now, item_id, worker) for item_id in ids],
+            )
+            return conn.total_changes - before
+
+    def holds(self, worker: str, item_id: int) -> bool:
+        """文件的租约是否仍由 worker 持有且未过期"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM items WHERE id = ? AND state = 'leased'"
+                " AND worker = ? AND lease_expires >= ?",
+                (item_id, worker, time.time()),
+            ).fetchone()
+        return row is not None
+
+    def record_article(
+        self, worker: str, item_id: int, article_result: Dict[str, Any]
+    ) -> bool:
+        """记录已创建的文章（重新领取时只创建引用话题）"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET article_result = ?, updated = ?"
+                " WHERE id = ? AND state = 'leased' AND worker = ?",
+                (json.dumps(article_result, ensure_ascii=False), time.time(),
+                 item_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, worker: str, item_id: int, status: str) -> bool:
+        """记录发布结果并释放租约，租约已不属于 worker 时返回 False
+
+        请求失败的文件回到 pending 重试（达到 MAX_ATTEMPTS 次后为 failed），
+        熔断未发送的文件回到 pending 且不计入尝试次数。
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM items WHERE id = ? AND state = 'leased'"
+                " AND worker = ?",
+                (item_id, worker),
+            ).fetchone()
+            if row is None:
+                return False
+            attempts = row["attempts"]
+            if status in DONE_STATUSES:
+                state = "done"
+            elif status == "circuit_open":
+                state, attempts = "pending", attempts - 1
+            else:
+                state = "failed" if attempts >= self.max_attempts else "pending"
+            conn.execute(
+                "UPDATE items SET state = ?, status = ?, attempts = ?, worker = NULL,"
+                " lease_expires = NULL, updated = ? WHERE id = ?",
+                (state, status, attempts, time.time(), item_id),
+            )
+        return True
+
+    def release(self, worker: str) -> int:
+        """退出时把 worker 持有的文件放回队列，返回放回的数量"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET state = 'pending', worker = NULL,"
+                " lease_expires = NULL, attempts = attempts - 1, updated = ?"
+                " WHERE state = 'leased' AND worker = ?",
+                (time.time(), worker),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的文件数（租约过期未收回的计入 leased）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) AS n FROM items GROUP BY state"
+            ).fetchall()
+        return {row["state"]: row["n"] for row in rows}
+
+
+class QueueLease:
+    """一次领取的文件，作为 publish_batch 的检查点使用
+
+    发布结果和已创建的文章写回队列；准备好的数据只在本机使用，不写入队列。
+    """
+
+    def __init__(self, queue: WorkQueue, worker: str, items: List[Dict[str, Any]]):
+        self.queue = queue
+        self.worker = worker
+        self._items = {item["path"]: item for item in items}
+        self._lock = threading.Lock()
+
+    @property
+    def paths(self) -> List[Path]:
+        return [Path(path) for path in self._items]
+
+    def state(self, path: Path) -> str:
+        with self._lock:
+            item = self._items[str(path)]
+            return "article_created" if item["article_result"] else "pending"
+
+    def item(self, path: Path) -> Dict[str, Any]:
+        """发送前调用: 确认租约仍由自己持有
+
+        Raises:
+            LeaseLostError: 租约已过期（文件可能已被其他发布器领取，不能再发送）
+        """
+        with self._lock:
+            item = dict(self._items[str(path)])
+        if not self.queue.holds(self.worker, item["id"]):
+            raise LeaseLostError(f"租约已过期，不再发送: {path}")
+        return item
+
+    def update(self, path: Path, state: str, **fields: Any) -> None:
+        with self._lock:
+            item = self._items[str(path)]
+            if state == "article_created":
+                item["article_result"] = fields["article_result"]
+        if state == "article_created":
+            held = self.queue.record_article(
+                self.worker, item["id"], fields["article_result"]
+            )
+        elif state in ("done", "failed"):
+            held = self.queue.complete(self.worker, item["id"], fields["status"])
+        else:
+            return
+        if not held:
+            print(f"  [WARN] 租约已被收回，结果未写入队列: {Path(path).name}")
+
+    def save_prepared(self, path: Path, prepared: Dict[str, Any]) -> None:
+        pass
+
+    def load_prepared(self, path: Path) -> Optional[Dict[str, Any]]:
+        return None
+
+    def discard_prepared(self, path: Path) -> None:
+        pass
+
+    @contextmanager
+    def heartbeat(self) -> Iterator[None]:
+        """发布期间在后台线程中定期续约"""
+        stop = threading.Event()
+        ids = [item["id"] for item in self._items.values()]
+
+        def beat() -> None:
+            while not stop.wait(self.queue.lease_seconds / 3):
+                try:
+                    self.queue.renew(self.worker, ids)
+                except sqlite3.Error as e:
+                    print(f"  [WARN] 续约失败: {e}")
+
+        thread = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def drain_queue(
+    pub: Any,
+    queue: WorkQueue,
+    worker: str,
+    claim_size: int = CLAIM_SIZE,
+    **batch_options: Any,
+) -> List[Dict[str, Any]]:
+    """领取并发布队列中的文件，直到队列中没有待发布或被领取的文件
+
+    其他发布器持有的租约到期前会等待，以便接手失联发布器的文件。
+    发布器熔断时放回剩余文件并停止（由其他发布器继续）。
+
+    Args:
+        pub: ZsxqPublisher 实例
+        queue: 发布队列
+        worker: 发布器标识（写入租约）
+        claim_size: 每次领取的文件数
+        batch_options: 传给 publish_batch 的参数
+            （mode/tags/interval/jobs/prefetch/max_concurrency）
+    Returns:
+        本发布器处理的文件结果（与批量发布结果格式相同）
+    """
+    poll_seconds = min(5.0, queue.lease_seconds / 4)
+    results: List[Dict[str, Any]] = []
+    try:
+        while True:
+            items = queue.claim(worker, claim_size)
+            if not items:
+                if not queue.counts().get("leased"):
+                    break
+                # 剩余文件都被其他发布器持有，等待完成或租约过期
+                time.sleep(poll_seconds)
+                continue
+
+            lease = QueueLease(queue, worker, items)
+            print(f"领取 {len(items)} 个文件（{worker}）")
+            with lease.heartbeat():
+                batch_results = publish_batch(
+                    pub, lease.paths, checkpoint=lease, **batch_options
+                )
+            results.extend(batch_results)
+            if any(r["status"] == "circuit_open" for r in batch_results):
+                print("API 熔断，停止领取（剩余文件由其他发布器继续）")
+                break
+    finally:
+        queue.release(worker)
+    return results